@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrence du Dashboard Grades
+
+Envoie des requêtes concurrentes sur les routes API (qui interrogent la base)
+et sonde /health en parallèle. Si la boucle d'événements est bloquée par une
+requête SQL, la latence de /health explose: c'est ce que l'on mesure.
+
+Usage:
+    python benchmarks/bench_concurrency.py --url http://localhost:8000 \\
+        --session <session_token> --path /api/group/G1 --concurrency 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats import summarize  # noqa: E402
+
+
+async def load_worker(client: httpx.AsyncClient, paths: List[str], queue: asyncio.Queue,
+                      latencies: List[float], errors: List[int]):
+    """Consomme la file de requêtes et mesure chaque appel"""
+    while True:
+        try:
+            i = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors[0] += 1
+        except httpx.HTTPError:
+            errors[0] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+async def health_probe(client: httpx.AsyncClient, stop: asyncio.Event,
+                       latencies: List[float], interval: float):
+    """Sonde /health pendant la charge pour détecter le blocage de la boucle"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def run(args) -> List[Dict]:
+    cookies = {"session_token": args.session} if args.session else {}
+    limits = httpx.Limits(max_connections=args.concurrency + 1,
+                          max_keepalive_connections=args.concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=args.url, cookies=cookies, limits=limits,
+                                 timeout=args.timeout) as client:
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(args.requests):
+            queue.put_nowait(i)
+
+        load_latencies: List[float] = []
+        health_latencies: List[float] = []
+        errors = [0]
+        stop = asyncio.Event()
+
+        probe = asyncio.create_task(health_probe(client, stop, health_latencies, args.probe_interval))
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            load_worker(client, args.path, queue, load_latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    return [
+        summarize(", ".join(args.path), load_latencies, errors[0], elapsed),
+        summarize("/health (sonde)", health_latencies, 0, elapsed),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrence du Dashboard Grades")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL du dashboard")
+    parser.add_argument("--session", default="", help="Cookie session_token d'un enseignant")
+    parser.add_argument("--path", action="append", default=None,
+                        help="Route à charger (répétable), ex: /api/group/G1")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requêtes simultanées")
+    parser.add_argument("--requests", type=int, default=1000, help="Nombre total de requêtes")
+    parser.add_argument("--probe-interval", type=float, default=0.05,
+                        help="Intervalle entre deux sondes /health (secondes)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout HTTP (secondes)")
+    args = parser.parse_args()
+    args.path = args.path or ["/api/group/G1"]
+
+    results = asyncio.run(run(args))
+
+    print(f"{'route':<40} {'n':>6} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for r in results:
+        print(f"{r['name']:<40} {r['count']:>6} {r['errors']:>5} {r['rps']:>8.1f} "
+              f"{r['p50']:>7.1f}ms {r['p95']:>7.1f}ms {r['p99']:>7.1f}ms {r['max']:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Diffusion des événements "nouvelle note" aux clients SSE
+
+Une seule connexion LISTEN (voir main.py) alimente le broker; chaque client
+abonné possède sa propre file bornée. Un client trop lent perd des
+événements plutôt que de ralentir les autres.
+"""
+
+from typing import Dict, Optional, Set
+import asyncio
+import json
+
+
+class GradeEventBroker:
+    """Répartit les événements par groupe vers les files des abonnés"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        # Clé None: abonnés à tous les groupes
+        self._subscribers: Dict[Optional[str], Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, groupe: Optional[str] = None) -> asyncio.Queue:
+        """Abonne un client à un groupe (ou à tous si groupe est None)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(groupe, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, groupe: Optional[str] = None):
+        """Désabonne un client"""
+        subscribers = self._subscribers.get(groupe)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[groupe]
+
+    def publish(self, event: dict):
+        """Envoie un événement aux abonnés de son groupe et aux abonnés globaux"""
+        self.published += 1
+        targets = list(self._subscribers.get(event.get("groupe"), ())) + list(self._subscribers.get(None, ()))
+        for queue in targets:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    def on_notification(self, connection, pid, channel, payload: str):
+        """Callback asyncpg pour le canal new_grade"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            print(f"⚠️  Notification {channel} invalide: {payload[:100]}")
+            return
+        self.publish(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+def format_sse(event: dict, event_type: str = "grade") -> str:
+    """Sérialise un événement au format Server-Sent Events"""
+    lines = []
+    if event.get("grade_id") is not None:
+        lines.append(f"id: {event['grade_id']}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(event, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
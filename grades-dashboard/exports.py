@@ -0,0 +1,99 @@
+"""
+Export des notes en flux (NDJSON, CSV, XLSX)
+
+Les lignes arrivent d'un curseur serveur et sont sérialisées au fil de l'eau:
+la mémoire reste constante quelle que soit la taille de la promotion.
+"""
+
+from openpyxl import Workbook
+from typing import AsyncIterator, Dict
+from urllib.parse import quote
+import csv
+import io
+import json
+import re
+import unicodedata
+
+# Colonnes exportées (dans l'ordre)
+EXPORT_COLUMNS = [
+    "groupe",
+    "student_id",
+    "prenom",
+    "nom",
+    "email",
+    "td_code",
+    "note",
+    "tentatives",
+    "tentatives_restantes",
+    "max_atteint",
+    "derniere_soumission"
+]
+
+# Nombre de lignes regroupées par chunk HTTP
+CHUNK_ROWS = 500
+
+
+def content_disposition(filename: str) -> str:
+    """
+    En-tête Content-Disposition d'un fichier téléchargé
+
+    filename= reçoit une version ASCII sans caractères spéciaux (les en-têtes
+    sont encodés en latin-1; un guillemet ou un point-virgule les casserait),
+    filename*= le nom exact encodé en UTF-8 (RFC 6266).
+    """
+    # Accents retirés, tout autre caractère remplacé par un tiret
+    decomposed = unicodedata.normalize("NFKD", filename)
+    ascii_name = "".join(char for char in decomposed if not unicodedata.combining(char))
+    ascii_name = re.sub(r"[^A-Za-z0-9._]+", "-", ascii_name.replace("-", " ")).strip("-") or "export"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+async def iter_ndjson(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    """Une ligne JSON par enregistrement"""
+    buffer = []
+    async for row in rows:
+        buffer.append(json.dumps(row, ensure_ascii=False))
+        if len(buffer) >= CHUNK_ROWS:
+            yield ("\n".join(buffer) + "\n").encode("utf-8")
+            buffer = []
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode("utf-8")
+
+
+async def iter_csv(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    """CSV avec en-tête (BOM UTF-8 pour l'ouverture directe dans Excel)"""
+    output = io.StringIO()
+    output.write("\ufeff")
+    writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate(0)
+    yield output.getvalue().encode("utf-8")
+
+
+async def fill_xlsx(rows: AsyncIterator[Dict], sheet_title: str = "Notes") -> Workbook:
+    """
+    Remplit un classeur openpyxl en mode write_only.
+
+    Les lignes sont écrites dans un fichier temporaire au fil de l'eau
+    (pas de modèle en mémoire); il reste à appeler save() sur le résultat.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(EXPORT_COLUMNS)
+    async for row in rows:
+        sheet.append([row[column] for column in EXPORT_COLUMNS])
+    return workbook
+
+
+async def iter_file(path: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Lit un fichier par morceaux"""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
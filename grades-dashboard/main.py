@@ -4,19 +4,36 @@ Authentification via OAuth2 Gitea
 Support multilingue (EN/FR)
 """
 
-from fastapi import FastAPI, Request, Depends, HTTPException, status, Cookie
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, Depends, HTTPException, status, Cookie, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+from collections import namedtuple
+from response_cache import ResponseCache
+from sessions import MemorySessionStore, PostgresSessionStore, run_session_sweeper
+from events import GradeEventBroker, format_sse
+from exports import content_disposition, iter_ndjson, iter_csv, fill_xlsx, iter_file
+from startup import FirstRequestTimer, StartupMetrics, create_templates, precompile_templates
 import os
+import asyncio
+import asyncpg
 import httpx
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+from datetime import datetime
+from typing import Dict, Optional
 import secrets
 import json
+import base64
+import gzip
+import tempfile
+
+# Démarrage à froid mesuré depuis le chargement du module (voir startup.py)
+startup_metrics = StartupMetrics()
 
 # Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -28,30 +45,202 @@ SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_hex(32))
 ALLOWED_TEAM = os.getenv("ALLOWED_TEAM", "Enseignants")
 DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "en")
 
+# Pool de connexions et timeout par requête (en secondes)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "5"))
+
+# Sessions utilisateur: "memory" (un seul worker) ou "postgres" (partagées)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL = int(os.getenv("SESSION_TTL", "28800"))  # 8 heures
+SESSION_MAX_SIZE = int(os.getenv("SESSION_MAX_SIZE", "10000"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+
+# Client HTTP Gitea (pool keep-alive partagé)
+GITEA_MAX_CONNECTIONS = int(os.getenv("GITEA_MAX_CONNECTIONS", "50"))
+GITEA_TIMEOUT = float(os.getenv("GITEA_TIMEOUT", "10"))
+
+# Pagination et export des données de groupe
+GROUP_PAGE_MAX = int(os.getenv("GROUP_PAGE_MAX", "1000"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Nombre max de réponses JSON gardées en cache (ETag / 304)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+# Flux temps réel des nouvelles notes (SSE)
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+
+# Durée de vie du cache des statistiques globales (en secondes)
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "30"))
+
+# Templates Jinja: cache de bytecode sur disque, pas de rechargement en production
+ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", ".jinja-cache")
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", str(ENVIRONMENT != "production")).lower() in ("1", "true", "yes")
+
 # Charger les traductions
 with open("translations.json", "r", encoding="utf-8") as f:
     TRANSLATIONS = json.load(f)
 
-# Base de données
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def flatten_translations(tree: dict, prefix: str = "") -> Dict[str, object]:
+    """Aplatit l'arbre de traductions en clés pointées ("home.title")"""
+    flat = {}
+    for key, value in tree.items():
+        flat[prefix + key] = value
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f"{prefix}{key}."))
+    return flat
+
+class TranslationTable(dict):
+    """Traductions d'une langue en clés pointées; une clé inconnue se traduit par elle-même"""
+
+    def __missing__(self, key: str):
+        return key
+
+# Traductions précompilées: une table par langue, complétée par l'anglais
+FLAT_TRANSLATIONS = {
+    lang: TranslationTable({**flatten_translations(TRANSLATIONS["en"]), **flatten_translations(tree)})
+    for lang, tree in TRANSLATIONS.items()
+}
+
+def get_translator(lang: str):
+    """
+    Fonction t('clé') des templates pour une langue (langue → anglais → clé)
 
-# Sessions utilisateur (simple, en mémoire)
-user_sessions = {}
+    Liée une fois par rendu et passée dans le contexte: chaque appel est un
+    accès direct à la table, sans relire `lang` dans le contexte Jinja.
+    """
+    return FLAT_TRANSLATIONS.get(lang, FLAT_TRANSLATIONS["en"]).__getitem__
 
 def get_translation(lang: str, key: str):
-    """Récupère une traduction"""
-    keys = key.split(".")
-    value = TRANSLATIONS.get(lang, TRANSLATIONS["en"])
-    for k in keys:
-        value = value.get(k, key)
-    return value
+    """Récupère une traduction (langue demandée → anglais → clé)"""
+    return get_translator(lang)(key)
+
+def get_async_database_url(url: str) -> str:
+    """Convertit l'URL PostgreSQL (psycopg2) en URL asyncpg"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+# Base de données (asynchrone, asyncpg)
+# - command_timeout: le client abandonne une requête trop longue
+# - statement_timeout: filet de sécurité côté serveur (légèrement plus long)
+engine = create_async_engine(
+    get_async_database_url(DATABASE_URL),
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    connect_args={
+        "command_timeout": DB_QUERY_TIMEOUT,
+        "server_settings": {"statement_timeout": str(int((DB_QUERY_TIMEOUT + 1) * 1000))}
+    }
+)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+# DSN libpq pour la connexion LISTEN dédiée (hors pool SQLAlchemy)
+PG_DSN = get_async_database_url(DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+
+# Sessions utilisateur
+if SESSION_BACKEND == "postgres":
+    session_store = PostgresSessionStore(SESSION_TTL, SessionLocal)
+else:
+    session_store = MemorySessionStore(SESSION_TTL, max_size=SESSION_MAX_SIZE)
+
+# Diffusion des nouvelles notes aux clients SSE (une seule connexion LISTEN)
+grade_events = GradeEventBroker(queue_size=SSE_QUEUE_SIZE)
+
+# Cache des réponses JSON indexé par tampon de version
+response_cache = ResponseCache(max_entries=RESPONSE_CACHE_SIZE)
+
+# Statistiques globales: accès par index (templates) ou par nom
+GlobalStats = namedtuple("GlobalStats", [
+    "total_etudiants", "total_tds", "total_soumissions", "note_moyenne_globale", "avg_attempts"
+])
+
+# Cache des statistiques globales (TTL + invalidation par NOTIFY grades_changed)
+stats_cache = {"value": None, "expires_at": 0.0}
+
+def invalidate_stats_cache(*args):
+    """Invalide le cache des statistiques (signature compatible asyncpg listener)"""
+    stats_cache["value"] = None
+
+async def get_global_stats(db: AsyncSession) -> GlobalStats:
+    """Statistiques globales lues dans dashboard_counters (temps constant)"""
+    now = time.monotonic()
+    if stats_cache["value"] is not None and now < stats_cache["expires_at"]:
+        return stats_cache["value"]
+
+    row = (await db.execute(text("""
+        SELECT
+            total_etudiants,
+            total_tds,
+            total_soumissions,
+            COALESCE(somme_notes / NULLIF(nb_notes, 0), 0) as note_moyenne_globale,
+            COALESCE(total_soumissions::numeric / NULLIF(nb_couples, 0), 0) as avg_attempts
+        FROM dashboard_counters
+    """))).fetchone()
+
+    stats = GlobalStats(
+        total_etudiants=row[0] if row else 0,
+        total_tds=row[1] if row else 0,
+        total_soumissions=row[2] if row else 0,
+        note_moyenne_globale=float(row[3]) if row else 0.0,
+        avg_attempts=float(row[4]) if row else 0.0
+    )
+    stats_cache["value"] = stats
+    stats_cache["expires_at"] = now + STATS_CACHE_TTL
+    return stats
+
+async def listen_grade_notifications():
+    """Connexion LISTEN dédiée: invalide les caches et diffuse les nouvelles notes"""
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(PG_DSN)
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda c: closed.set())
+            await conn.add_listener("grades_changed", invalidate_stats_cache)
+            await conn.add_listener("new_grade", grade_events.on_notification)
+            # Une notification a pu être manquée pendant la reconnexion
+            invalidate_stats_cache()
+            await closed.wait()
+        except asyncio.CancelledError:
+            if conn is not None:
+                await conn.close()
+            raise
+        except Exception as e:
+            print(f"⚠️  Écoute des notifications interrompue: {e}")
+        await asyncio.sleep(5)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application"""
     print("🚀 Démarrage du Dashboard...")
+    startup_metrics.templates = precompile_templates(templates)
+    app.state.gitea_client = httpx.AsyncClient(
+        base_url=GITEA_URL,
+        limits=httpx.Limits(
+            max_connections=GITEA_MAX_CONNECTIONS,
+            max_keepalive_connections=GITEA_MAX_CONNECTIONS
+        ),
+        timeout=GITEA_TIMEOUT
+    )
+    background_tasks = [
+        asyncio.create_task(listen_grade_notifications()),
+        asyncio.create_task(run_session_sweeper(session_store, SESSION_SWEEP_INTERVAL))
+    ]
+    startup_metrics.mark_ready()
+    print(f"⏱️  Prêt en {startup_metrics.ready_ms:.0f} ms")
     yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await app.state.gitea_client.aclose()
+    await engine.dispose()
     print("🛑 Arrêt du Dashboard...")
 
 app = FastAPI(
@@ -59,55 +248,54 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-templates = Jinja2Templates(directory="templates")
+app.add_middleware(FirstRequestTimer, metrics=startup_metrics)
+
+templates = create_templates("templates", JINJA_CACHE_DIR, TEMPLATES_AUTO_RELOAD)
+
+@app.exception_handler(TimeoutError)
+@app.exception_handler(PoolTimeoutError)
+async def query_timeout_handler(request: Request, exc: Exception):
+    """Requête SQL trop longue ou pool saturé: réponse 503 au lieu de bloquer"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Base de données indisponible, réessayez plus tard"}
+    )
 
 # Dépendance: Récupérer la session DB
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Dépendance: Vérifier l'authentification
 async def get_current_user(request: Request):
     """Vérifie si l'utilisateur est authentifié"""
     session_token = request.cookies.get("session_token")
 
-    if not session_token or session_token not in user_sessions:
+    if not session_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Non authentifié"
         )
 
-    user_data = user_sessions[session_token]
-
-    # Vérifier l'expiration
-    if datetime.now() > user_data["expires_at"]:
-        del user_sessions[session_token]
+    # Session absente ou expirée (le store supprime les sessions expirées)
+    user = await session_store.get(session_token)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Session expirée"
         )
 
-    return user_data["user"]
+    return user
 
 # Dépendance optionnelle: Vérifier l'authentification sans lever d'exception
 async def get_current_user_optional(request: Request):
     """Vérifie si l'utilisateur est authentifié, retourne None si non authentifié"""
     session_token = request.cookies.get("session_token")
 
-    if not session_token or session_token not in user_sessions:
-        return None
-
-    user_data = user_sessions[session_token]
-
-    # Vérifier l'expiration
-    if datetime.now() > user_data["expires_at"]:
-        del user_sessions[session_token]
+    if not session_token:
         return None
 
-    return user_data["user"]
+    return await session_store.get(session_token)
 
 # Routes d'authentification OAuth2
 @app.get("/login")
@@ -128,75 +316,77 @@ async def login():
     return RedirectResponse(auth_url)
 
 @app.get("/callback")
-async def callback(code: str, state: str):
+async def callback(request: Request, code: str, state: str):
     """Callback OAuth2 après authentification Gitea"""
-    
+    client: httpx.AsyncClient = request.app.state.gitea_client
+
     # Échange du code contre un token
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            f"{GITEA_URL}/login/oauth/access_token",
-            data={
-                "client_id": OAUTH_CLIENT_ID,
-                "client_secret": OAUTH_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": "https://grades.zohrabi.cloud/callback"
-            }
-        )
-        
-        if token_response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Échec de l'authentification")
-        
-        token_data = token_response.json()
-        access_token = token_data.get("access_token")
-        
-        # Récupérer les infos utilisateur
-        user_response = await client.get(
-            f"{GITEA_URL}/api/v1/user",
-            headers={"Authorization": f"token {access_token}"}
-        )
-        
-        user_info = user_response.json()
-        
-        # Vérifier si l'utilisateur est dans l'équipe "Enseignants"
-        teams_response = await client.get(
-            f"{GITEA_URL}/api/v1/user/teams",
-            headers={"Authorization": f"token {access_token}"}
-        )
+    token_response = await client.post(
+        "/login/oauth/access_token",
+        data={
+            "client_id": OAUTH_CLIENT_ID,
+            "client_secret": OAUTH_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": "https://grades.zohrabi.cloud/callback"
+        }
+    )
+
+    if token_response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Échec de l'authentification")
+
+    token_data = token_response.json()
+    access_token = token_data.get("access_token")
+    auth_headers = {"Authorization": f"token {access_token}"}
+
+    # Infos utilisateur et équipes en parallèle; les deux réponses sont
+    # toujours attendues (pas d'annulation qui casserait une connexion du pool)
+    user_response, teams_response = await asyncio.gather(
+        client.get("/api/v1/user", headers=auth_headers),
+        client.get("/api/v1/user/teams", headers=auth_headers),
+        return_exceptions=True
+    )
+
+    if isinstance(user_response, BaseException):
+        raise user_response
+    if user_response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Échec de l'authentification")
 
+    user_info = user_response.json()
+
+    # Vérifier si l'utilisateur est dans l'équipe "Enseignants"
+    teams = []
+    if not isinstance(teams_response, BaseException) and teams_response.status_code == 200:
         teams = teams_response.json()
-        is_teacher = any(team.get("name") == ALLOWED_TEAM for team in teams)
-
-        # Créer une session
-        session_token = secrets.token_urlsafe(32)
-        user_sessions[session_token] = {
-            "user": {
-                "id": user_info["id"],
-                "username": user_info["login"],
-                "email": user_info["email"],
-                "full_name": user_info.get("full_name", user_info["login"]),
-                "is_teacher": is_teacher
-            },
-            "expires_at": datetime.now() + timedelta(hours=8)
-        }
-        
-        # Rediriger vers le dashboard
-        response = RedirectResponse(url="/", status_code=302)
-        response.set_cookie(
-            key="session_token",
-            value=session_token,
-            httponly=True,
-            max_age=28800,  # 8 heures
-            samesite="lax"
-        )
-        return response
+    is_teacher = any(team.get("name") == ALLOWED_TEAM for team in teams)
+
+    # Créer une session
+    session_token = await session_store.create({
+        "id": user_info["id"],
+        "username": user_info["login"],
+        # Comparé en minuscules à students.email (voir import_students.py)
+        "email": user_info["email"].lower(),
+        "full_name": user_info.get("full_name", user_info["login"]),
+        "is_teacher": is_teacher
+    })
+
+    # Rediriger vers le dashboard
+    response = RedirectResponse(url="/", status_code=302)
+    response.set_cookie(
+        key="session_token",
+        value=session_token,
+        httponly=True,
+        max_age=SESSION_TTL,
+        samesite="lax"
+    )
+    return response
 
 @app.get("/logout")
 async def logout(request: Request):
     """Déconnexion"""
     session_token = request.cookies.get("session_token")
-    if session_token in user_sessions:
-        del user_sessions[session_token]
+    if session_token:
+        await session_store.delete(session_token)
     
     response = RedirectResponse(url="/login")
     response.delete_cookie("session_token")
@@ -208,7 +398,7 @@ async def dashboard(
     request: Request,
     lang: Optional[str] = Cookie(default=DEFAULT_LANGUAGE),
     user: Optional[dict] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Page principale du dashboard"""
 
@@ -223,29 +413,15 @@ async def dashboard(
     # Si c'est un enseignant, afficher la vue complète
     if user.get("is_teacher", False):
         # Récupérer les statistiques globales
-        stats_query = text("""
-            SELECT
-                COUNT(DISTINCT s.id) as total_etudiants,
-                COUNT(DISTINCT a.id) as total_tds,
-                COUNT(sub.id) as total_soumissions,
-                COALESCE(AVG(g.note), 0) as note_moyenne_globale,
-                COALESCE(AVG(am.nb_tentatives), 0) as avg_attempts
-            FROM students s
-            CROSS JOIN assignments a
-            LEFT JOIN submissions sub ON s.id = sub.student_id
-            LEFT JOIN grades g ON sub.id = g.submission_id
-            LEFT JOIN activity_metrics am ON s.id = am.student_id AND a.id = am.assignment_id
-        """)
-
-        stats = db.execute(stats_query).fetchone()
+        stats = await get_global_stats(db)
 
         # Récupérer les groupes
         groupes_query = text("SELECT DISTINCT groupe FROM students ORDER BY groupe")
-        groupes = [row[0] for row in db.execute(groupes_query).fetchall()]
+        groupes = [row[0] for row in (await db.execute(groupes_query)).fetchall()]
 
         # Récupérer les TDs
         tds_query = text("SELECT id, code, nom FROM assignments ORDER BY code")
-        tds = db.execute(tds_query).fetchall()
+        tds = (await db.execute(tds_query)).fetchall()
 
         return templates.TemplateResponse("dashboard.html", {
             "request": request,
@@ -254,14 +430,14 @@ async def dashboard(
             "groupes": groupes,
             "tds": tds,
             "lang": lang,
-            "t": lambda key: get_translation(lang, key)
+            "t": get_translator(lang)
         })
 
     # Si c'est un étudiant, afficher uniquement ses notes
     else:
         # Trouver l'étudiant par email
-        student_query = text("SELECT id, prenom, nom, email, groupe FROM students WHERE email = :email")
-        student = db.execute(student_query, {"email": user["email"]}).fetchone()
+        student_query = text("SELECT id, prenom, nom, email, groupe FROM students WHERE lower(email) = :email")
+        student = (await db.execute(student_query, {"email": user["email"].lower()})).fetchone()
 
         if not student:
             raise HTTPException(
@@ -276,20 +452,18 @@ async def dashboard(
             SELECT
                 a.code as td_code,
                 a.nom as td_nom,
-                MAX(g.note) as meilleure_note,
-                COUNT(sub.id) as nb_tentatives,
-                5 - COUNT(sub.id) as tentatives_restantes,
-                MAX(sub.submitted_at) as derniere_soumission,
-                MAX(g.tests_passed) as tests_passed,
-                MAX(g.tests_total) as tests_total
+                gs.meilleure_note,
+                COALESCE(gs.nb_tentatives, 0) as nb_tentatives,
+                5 - COALESCE(gs.nb_tentatives, 0) as tentatives_restantes,
+                gs.derniere_soumission,
+                gs.tests_passed,
+                gs.tests_total
             FROM assignments a
-            LEFT JOIN submissions sub ON a.id = sub.assignment_id AND sub.student_id = :student_id
-            LEFT JOIN grades g ON sub.id = g.submission_id
-            GROUP BY a.id, a.code, a.nom
+            LEFT JOIN grade_summary gs ON a.id = gs.assignment_id AND gs.student_id = :student_id
             ORDER BY a.code
         """)
 
-        grades = db.execute(grades_query, {"student_id": student_id}).fetchall()
+        grades = (await db.execute(grades_query, {"student_id": student_id})).fetchall()
 
         # Calculer la moyenne
         notes = [float(g[2]) for g in grades if g[2] is not None]
@@ -308,65 +482,244 @@ async def dashboard(
             "grades": grades,
             "moyenne": moyenne,
             "lang": lang,
-            "t": lambda key: get_translation(lang, key)
+            "t": get_translator(lang)
         })
 
+def etag_matches(request: Request, etag: str) -> bool:
+    """Vérifie si l'en-tête If-None-Match du client contient l'ETag"""
+    header = request.headers.get("if-none-match", "")
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return etag in candidates or "*" in candidates
+
+async def cached_json_response(request: Request, key: str, stamp: str, build) -> Response:
+    """
+    Réponse JSON mise en cache tant que `stamp` ne change pas.
+
+    `build` est une coroutine retournant (données, en-têtes); elle n'est
+    appelée qu'en cas de défaut de cache.
+    """
+    etag = ResponseCache.make_etag(key, stamp)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request, etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(key, stamp)
+    if cached is None:
+        data, extra_headers = await build()
+        cached = (JSONResponse(data).body, extra_headers)
+        response_cache.put(key, stamp, *cached)
+
+    body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
+
+# Lignes (étudiant, TD) d'un ou plusieurs groupes, triées pour la pagination par clé
+GROUP_ROWS_QUERY = """
+    SELECT
+        s.id as student_id,
+        s.prenom,
+        s.nom,
+        s.email,
+        a.code as td_code,
+        gs.meilleure_note,
+        COALESCE(gs.nb_tentatives, 0) as nb_tentatives,
+        5 - COALESCE(gs.nb_tentatives, 0) as tentatives_restantes,
+        COALESCE(gs.nb_tentatives, 0) >= 5 as max_atteint,
+        gs.derniere_soumission,
+        s.groupe
+    FROM students s
+    CROSS JOIN assignments a
+    LEFT JOIN grade_summary gs ON s.id = gs.student_id AND a.id = gs.assignment_id
+    WHERE {where}
+    ORDER BY {order}
+"""
+
+def group_row_to_dict(r) -> dict:
+    """Format JSON d'une ligne de GROUP_ROWS_QUERY"""
+    return {
+        "student_id": r[0],
+        "prenom": r[1],
+        "nom": r[2],
+        "email": r[3],
+        "td_code": r[4],
+        "note": float(r[5]) if r[5] else None,
+        "tentatives": r[6],
+        "tentatives_restantes": r[7],
+        "max_atteint": r[8],
+        "derniere_soumission": r[9].isoformat() if r[9] else None
+    }
+
+def encode_cursor(r) -> str:
+    """Curseur opaque: position (nom, prenom, id, td_code) de la dernière ligne"""
+    raw = json.dumps([r[2], r[1], r[0], r[4]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> dict:
+    """Décode un curseur, 400 s'il est invalide"""
+    try:
+        nom, prenom, student_id, td_code = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {"c_nom": str(nom), "c_prenom": str(prenom), "c_id": int(student_id), "c_code": str(td_code)}
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
 @app.get("/api/group/{groupe}", response_class=JSONResponse)
 async def get_group_data(
     groupe: str,
+    request: Request,
     lang: Optional[str] = Cookie(default=DEFAULT_LANGUAGE),
+    limit: Optional[int] = Query(default=None, ge=1, le=GROUP_PAGE_MAX),
+    cursor: Optional[str] = None,
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """API: Récupérer les données d'un groupe avec tentatives"""
-    
-    query = text("""
-        SELECT 
-            s.id as student_id,
-            s.prenom,
-            s.nom,
-            s.email,
-            a.code as td_code,
-            MAX(g.note) as meilleure_note,
-            COUNT(sub.id) as nb_tentatives,
-            5 - COUNT(sub.id) as tentatives_restantes,
-            CASE WHEN COUNT(sub.id) >= 5 THEN true ELSE false END as max_atteint,
-            MAX(sub.submitted_at) as derniere_soumission
-        FROM students s
-        CROSS JOIN assignments a
-        LEFT JOIN submissions sub ON s.id = sub.student_id AND a.id = sub.assignment_id
-        LEFT JOIN grades g ON sub.id = g.submission_id
-        WHERE s.groupe = :groupe
-        GROUP BY s.id, s.prenom, s.nom, s.email, a.id, a.code
-        ORDER BY s.nom, s.prenom, a.code
-    """)
-    
-    results = db.execute(query, {"groupe": groupe}).fetchall()
-    
-    return [
-        {
-            "student_id": r[0],
-            "prenom": r[1],
-            "nom": r[2],
-            "email": r[3],
-            "td_code": r[4],
-            "note": float(r[5]) if r[5] else None,
-            "tentatives": r[6],
-            "tentatives_restantes": r[7],
-            "max_atteint": r[8],
-            "derniere_soumission": r[9].isoformat() if r[9] else None
-        }
-        for r in results
-    ]
+    """
+    API: Récupérer les données d'un groupe avec tentatives
+
+    Sans `limit`, retourne tout le groupe. Avec `limit`, retourne une page et
+    le curseur de la page suivante dans l'en-tête X-Next-Cursor.
+    Réponse mise en cache (ETag) tant que group_versions ne change pas.
+    """
+    where = "s.groupe = :groupe"
+    params = {"groupe": groupe}
+
+    if cursor:
+        where += """ AND (s.nom, s.prenom, s.id, a.code) > (
+            CAST(:c_nom AS VARCHAR), CAST(:c_prenom AS VARCHAR),
+            CAST(:c_id AS INTEGER), CAST(:c_code AS VARCHAR)
+        )"""
+        params.update(decode_cursor(cursor))
+
+    sql = GROUP_ROWS_QUERY.format(where=where, order="s.nom, s.prenom, s.id, a.code")
+    if limit:
+        sql += " LIMIT :limit"
+        params["limit"] = limit + 1
+
+    async def build():
+        results = (await db.execute(text(sql), params)).fetchall()
+
+        headers = {}
+        if limit and len(results) > limit:
+            results = results[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(results[-1])
+
+        return [group_row_to_dict(r) for r in results], headers
+
+    # Tampon de version: une lecture par clé primaire
+    version_query = text("SELECT version FROM group_versions WHERE groupe = :groupe")
+    version = (await db.execute(version_query, {"groupe": groupe})).scalar() or 0
+
+    key = f"group:{groupe}:{limit or ''}:{cursor or ''}"
+    return await cached_json_response(request, key, str(version), build)
+
+async def stream_group_rows(groupe: Optional[str]):
+    """Parcourt les lignes d'un groupe (ou de la promotion) via un curseur serveur"""
+    where = "s.groupe = :groupe" if groupe else "TRUE"
+    params = {"groupe": groupe} if groupe else {}
+    sql = GROUP_ROWS_QUERY.format(where=where, order="s.groupe, s.nom, s.prenom, s.id, a.code")
+
+    async with SessionLocal() as db:
+        result = await db.stream(text(sql), params, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+        async for r in result:
+            row = group_row_to_dict(r)
+            row["groupe"] = r[10]
+            yield row
+
+@app.get("/api/export")
+async def export_grades(
+    fmt: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv|xlsx)$"),
+    groupe: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """API: Export en flux des notes d'un groupe ou de toute la promotion (enseignants)"""
+    if not user.get("is_teacher", False):
+        raise HTTPException(status_code=403, detail="Réservé aux enseignants")
+
+    filename = f"notes-{groupe or 'promotion'}-{datetime.now():%Y%m%d}"
+
+    if fmt == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(stream_group_rows(groupe)),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": content_disposition(f"{filename}.ndjson")}
+        )
+
+    if fmt == "csv":
+        return StreamingResponse(
+            iter_csv(stream_group_rows(groupe)),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": content_disposition(f"{filename}.csv")}
+        )
+
+    # XLSX: classeur write_only sur disque, puis envoi par morceaux
+    workbook = await fill_xlsx(stream_group_rows(groupe), sheet_title=groupe or "Promotion")
+    tmp = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+    tmp.close()
+    try:
+        await run_in_threadpool(workbook.save, tmp.name)
+    except Exception:
+        os.remove(tmp.name)
+        raise
+
+    return StreamingResponse(
+        iter_file(tmp.name),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": content_disposition(f"{filename}.xlsx")},
+        background=BackgroundTask(os.remove, tmp.name)
+    )
+
+@app.get("/api/events")
+async def grade_event_stream(
+    request: Request,
+    groupe: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """API: Flux SSE des nouvelles notes d'un groupe (ou de tous les groupes)"""
+    if not user.get("is_teacher", False):
+        raise HTTPException(status_code=403, detail="Réservé aux enseignants")
+
+    queue = grade_events.subscribe(groupe)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Commentaire SSE: garde la connexion ouverte à travers les proxys
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            grade_events.unsubscribe(queue, groupe)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/stats", response_class=JSONResponse)
+async def get_stats(
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """API: Statistiques globales (compteurs maintenus par triggers, cache TTL; enseignants)"""
+    if not user.get("is_teacher", False):
+        raise HTTPException(status_code=403, detail="Réservé aux enseignants")
+
+    return (await get_global_stats(db))._asdict()
 
 @app.get("/api/student/{student_id}/details", response_class=JSONResponse)
 async def get_student_details(
     student_id: int,
+    request: Request,
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """API: Détails complets d'un étudiant"""
-    
+    """API: Détails complets d'un étudiant (mis en cache tant que son résumé ne change pas)"""
+
     query = text("""
         SELECT 
             sub.id,
@@ -376,7 +729,7 @@ async def get_student_details(
             g.note,
             g.tests_passed,
             g.tests_total,
-            g.rapport_html
+            g.id IS NOT NULL as has_report
         FROM submissions sub
         JOIN assignments a ON sub.assignment_id = a.id
         LEFT JOIN grades g ON sub.id = g.submission_id
@@ -384,21 +737,89 @@ async def get_student_details(
         ORDER BY sub.submitted_at DESC
     """)
     
-    results = db.execute(query, {"student_id": student_id}).fetchall()
-    
-    return [
-        {
-            "submission_id": r[0],
-            "td_code": r[1],
-            "commit": r[2][:7],
-            "date": r[3].isoformat(),
-            "note": float(r[4]) if r[4] else None,
-            "tests_passed": r[5],
-            "tests_total": r[6],
-            "rapport_html": r[7]
-        }
-        for r in results
-    ]
+    async def build():
+        results = (await db.execute(query, {"student_id": student_id})).fetchall()
+
+        return [
+            {
+                "submission_id": r[0],
+                "td_code": r[1],
+                "commit": r[2][:7],
+                "date": r[3].isoformat(),
+                "note": float(r[4]) if r[4] else None,
+                "tests_passed": r[5],
+                "tests_total": r[6],
+                "report_url": f"/api/submission/{r[0]}/report" if r[7] else None
+            }
+            for r in results
+        ], {}
+
+    # Tampon de version: lignes grade_summary de l'étudiant (maintenues par triggers)
+    stamp_query = text("""
+        SELECT COALESCE(SUM(nb_tentatives), 0), COALESCE(SUM(nb_notes), 0), MAX(updated_at)
+        FROM grade_summary
+        WHERE student_id = :student_id
+    """)
+    stamp = (await db.execute(stamp_query, {"student_id": student_id})).fetchone()
+
+    key = f"student:{student_id}"
+    return await cached_json_response(request, key, f"{stamp[0]}:{stamp[1]}:{stamp[2]}", build)
+
+@app.get("/api/submission/{submission_id}/report")
+async def get_submission_report(
+    submission_id: int,
+    request: Request,
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    API: Rapport HTML d'une soumission
+
+    Une nouvelle correction change le rapport: le navigateur revalide à
+    chaque affichage (no-cache) et reçoit un 304 tant que l'ETag (dernière
+    note, encodage) n'a pas changé.
+    """
+    meta_query = text("""
+        SELECT g.id, g.graded_at, s.email
+        FROM grades g
+        JOIN submissions sub ON sub.id = g.submission_id
+        JOIN students s ON s.id = sub.student_id
+        WHERE g.submission_id = :submission_id
+        ORDER BY g.graded_at DESC, g.id DESC
+        LIMIT 1
+    """)
+    meta = (await db.execute(meta_query, {"submission_id": submission_id})).fetchone()
+
+    if not meta:
+        raise HTTPException(status_code=404, detail="Rapport non trouvé")
+
+    # Un étudiant ne peut consulter que ses propres rapports
+    if not user.get("is_teacher", False) and meta[2].lower() != (user.get("email") or "").lower():
+        raise HTTPException(status_code=403, detail="Accès refusé")
+
+    grade_id, graded_at = meta[0], meta[1]
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    # Un ETag par encodage: les variantes gzip et identité ont des octets différents
+    etag = f'"report-{grade_id}-{int(graded_at.timestamp()) if graded_at else 0}{"-gzip" if use_gzip else ""}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding, Cookie"
+    }
+
+    # Le client a déjà ce rapport: pas besoin de charger rapport_html
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    report_query = text("SELECT rapport_html FROM grades WHERE id = :grade_id")
+    report = (await db.execute(report_query, {"grade_id": grade_id})).scalar() or ""
+    body = report.encode("utf-8")
+
+    if use_gzip:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
 
 @app.get("/set-language/{language}")
 async def set_language(language: str):
@@ -419,7 +840,13 @@ async def set_language(language: str):
 @app.get("/health")
 async def health():
     """Healthcheck"""
-    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "ok",
+        "timestamp": datetime.now().isoformat(),
+        "response_cache": response_cache.stats(),
+        "sse_subscribers": grade_events.subscriber_count(),
+        "startup": startup_metrics.as_dict()
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,54 @@
+"""
+Cache des réponses JSON du Dashboard Grades
+
+Chaque entrée est associée à un "tampon de version" peu coûteux à lire
+(ex: group_versions.version). Tant que le tampon ne change pas, la réponse
+est servie depuis la mémoire, ou par un 304 si le client a déjà l'ETag.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import hashlib
+
+
+class ResponseCache:
+    """Cache LRU borné de réponses (corps + en-têtes), avec compteurs"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, bytes, Dict[str, str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def make_etag(key: str, stamp: str) -> str:
+        """ETag fort dérivé de la clé et du tampon de version"""
+        digest = hashlib.sha1(f"{key}|{stamp}".encode("utf-8")).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def get(self, key: str, stamp: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """Retourne (corps, en-têtes) si l'entrée est à jour, sinon None"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: str, stamp: str, body: bytes, headers: Dict[str, str]):
+        """Mémorise une réponse (éviction LRU au-delà de max_entries)"""
+        self._entries[key] = (stamp, body, headers)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs exposés sur /health"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
@@ -0,0 +1,154 @@
+"""
+Stockage des sessions utilisateur du Dashboard Grades
+
+Deux backends interchangeables:
+- MemorySessionStore: dictionnaire ordonné en mémoire (un seul worker)
+- PostgresSessionStore: table user_sessions de la base grades (multi-workers, multi-réplicas)
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import Optional
+import asyncio
+import hashlib
+import json
+import secrets
+import time
+
+
+class SessionStore(ABC):
+    """Interface commune des backends de sessions"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def create(self, user: dict) -> str:
+        """Crée une session et retourne son token"""
+
+    @abstractmethod
+    async def get(self, token: str) -> Optional[dict]:
+        """Retourne l'utilisateur de la session, ou None si absente/expirée"""
+
+    @abstractmethod
+    async def delete(self, token: str):
+        """Supprime une session"""
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Supprime les sessions expirées et retourne leur nombre"""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions en mémoire, bornées à max_size entrées.
+
+    Toutes les sessions ont la même durée de vie: l'ordre d'insertion est donc
+    l'ordre d'expiration. Le balayage s'arrête à la première session encore
+    valide, soit un coût O(1) par session expirée.
+    """
+
+    def __init__(self, ttl: int, max_size: int = 10000):
+        super().__init__(ttl)
+        self.max_size = max_size
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def create(self, user: dict) -> str:
+        token = secrets.token_urlsafe(32)
+        while len(self._sessions) >= self.max_size:
+            # Plein: on sacrifie la session la plus ancienne
+            self._sessions.popitem(last=False)
+        self._sessions[token] = (user, time.monotonic() + self.ttl)
+        return token
+
+    async def get(self, token: str) -> Optional[dict]:
+        entry = self._sessions.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if time.monotonic() > expires_at:
+            del self._sessions[token]
+            return None
+        return user
+
+    async def delete(self, token: str):
+        self._sessions.pop(token, None)
+
+    async def sweep(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        while self._sessions:
+            token, (_, expires_at) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            self._sessions.popitem(last=False)
+            removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class PostgresSessionStore(SessionStore):
+    """
+    Sessions partagées dans la table user_sessions (voir postgres/init/05-user-sessions.sql).
+
+    Seul le hash SHA-256 du token est stocké: une fuite de la table ne permet
+    pas de réutiliser les sessions.
+    """
+
+    def __init__(self, ttl: int, session_factory: async_sessionmaker):
+        super().__init__(ttl)
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    async def create(self, user: dict) -> str:
+        token = secrets.token_urlsafe(32)
+        async with self.session_factory() as db:
+            await db.execute(text("""
+                INSERT INTO user_sessions (token_hash, user_data, expires_at)
+                VALUES (:token_hash, CAST(:user_data AS JSONB), CURRENT_TIMESTAMP + make_interval(secs => :ttl))
+            """), {"token_hash": self._hash(token), "user_data": json.dumps(user), "ttl": float(self.ttl)})
+            await db.commit()
+        return token
+
+    async def get(self, token: str) -> Optional[dict]:
+        async with self.session_factory() as db:
+            row = (await db.execute(text("""
+                SELECT user_data FROM user_sessions
+                WHERE token_hash = :token_hash AND expires_at > CURRENT_TIMESTAMP
+            """), {"token_hash": self._hash(token)})).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+
+    async def delete(self, token: str):
+        async with self.session_factory() as db:
+            await db.execute(
+                text("DELETE FROM user_sessions WHERE token_hash = :token_hash"),
+                {"token_hash": self._hash(token)}
+            )
+            await db.commit()
+
+    async def sweep(self) -> int:
+        async with self.session_factory() as db:
+            result = await db.execute(text("DELETE FROM user_sessions WHERE expires_at <= CURRENT_TIMESTAMP"))
+            await db.commit()
+        return result.rowcount
+
+
+async def run_session_sweeper(store: SessionStore, interval: float):
+    """Tâche de fond: purge périodique des sessions expirées"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await store.sweep()
+            if removed:
+                print(f"🧹 {removed} session(s) expirée(s) supprimée(s)")
+        except Exception as e:
+            print(f"⚠️  Purge des sessions impossible: {e}")
@@ -0,0 +1,173 @@
+-- ============================================
+-- Résumé matérialisé des notes par étudiant et TD
+-- ============================================
+-- Une ligne par couple (étudiant, TD) ayant au moins une soumission.
+-- Maintenu par triggers sur submissions/grades (comme activity_metrics),
+-- pour que le dashboard n'ait plus à ré-agréger toutes les soumissions.
+--
+-- Réparer une dérive éventuelle:
+--   docker compose exec -T postgres psql -U gitea -d grades -c "SELECT rebuild_grade_summary();"
+
+\c grades;
+
+CREATE TABLE IF NOT EXISTS grade_summary (
+    student_id INTEGER REFERENCES students(id) ON DELETE CASCADE,
+    assignment_id INTEGER REFERENCES assignments(id) ON DELETE CASCADE,
+    meilleure_note DECIMAL(5,2),
+    somme_notes DECIMAL(10,2) DEFAULT 0,
+    nb_notes INTEGER DEFAULT 0,
+    nb_tentatives INTEGER DEFAULT 0,
+    derniere_soumission TIMESTAMP,
+    tests_passed INTEGER,
+    tests_total INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (student_id, assignment_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_grade_summary_assignment ON grade_summary(assignment_id);
+
+-- Recalcule la ligne d'un couple (étudiant, TD) à partir des tables sources.
+-- Au plus quelques soumissions par couple: le coût est constant.
+CREATE OR REPLACE FUNCTION refresh_grade_summary(p_student_id INTEGER, p_assignment_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_student_id IS NULL OR p_assignment_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM submissions
+        WHERE student_id = p_student_id AND assignment_id = p_assignment_id
+    ) THEN
+        DELETE FROM grade_summary
+        WHERE student_id = p_student_id AND assignment_id = p_assignment_id;
+        RETURN;
+    END IF;
+
+    INSERT INTO grade_summary (
+        student_id, assignment_id, meilleure_note, somme_notes, nb_notes,
+        nb_tentatives, derniere_soumission, tests_passed, tests_total, updated_at
+    )
+    SELECT
+        p_student_id,
+        p_assignment_id,
+        MAX(g.note),
+        COALESCE(SUM(g.note), 0),
+        COUNT(g.id),
+        COUNT(DISTINCT sub.id),
+        MAX(sub.submitted_at),
+        MAX(g.tests_passed),
+        MAX(g.tests_total),
+        CURRENT_TIMESTAMP
+    FROM submissions sub
+    LEFT JOIN grades g ON sub.id = g.submission_id
+    WHERE sub.student_id = p_student_id AND sub.assignment_id = p_assignment_id
+    ON CONFLICT (student_id, assignment_id)
+    DO UPDATE SET
+        meilleure_note = EXCLUDED.meilleure_note,
+        somme_notes = EXCLUDED.somme_notes,
+        nb_notes = EXCLUDED.nb_notes,
+        nb_tentatives = EXCLUDED.nb_tentatives,
+        derniere_soumission = EXCLUDED.derniere_soumission,
+        tests_passed = EXCLUDED.tests_passed,
+        tests_total = EXCLUDED.tests_total,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger sur submissions: rafraîchit l'ancien et le nouveau couple
+CREATE OR REPLACE FUNCTION update_grade_summary_from_submission()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_grade_summary(NEW.student_id, NEW.assignment_id);
+    END IF;
+
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND
+        (OLD.student_id, OLD.assignment_id) IS DISTINCT FROM (NEW.student_id, NEW.assignment_id)) THEN
+        PERFORM refresh_grade_summary(OLD.student_id, OLD.assignment_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_grade_summary_submissions ON submissions;
+CREATE TRIGGER trigger_update_grade_summary_submissions
+AFTER INSERT OR UPDATE OR DELETE ON submissions
+FOR EACH ROW
+EXECUTE FUNCTION update_grade_summary_from_submission();
+
+-- Trigger sur grades: retrouve le couple via la soumission notée
+CREATE OR REPLACE FUNCTION update_grade_summary_from_grade()
+RETURNS TRIGGER AS $$
+DECLARE
+    sub RECORD;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT student_id, assignment_id INTO sub FROM submissions WHERE id = NEW.submission_id;
+        IF FOUND THEN
+            PERFORM refresh_grade_summary(sub.student_id, sub.assignment_id);
+        END IF;
+    END IF;
+
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.submission_id IS DISTINCT FROM NEW.submission_id) THEN
+        SELECT student_id, assignment_id INTO sub FROM submissions WHERE id = OLD.submission_id;
+        IF FOUND THEN
+            PERFORM refresh_grade_summary(sub.student_id, sub.assignment_id);
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_grade_summary_grades ON grades;
+CREATE TRIGGER trigger_update_grade_summary_grades
+AFTER INSERT OR UPDATE OR DELETE ON grades
+FOR EACH ROW
+EXECUTE FUNCTION update_grade_summary_from_grade();
+
+-- Reconstruction complète (réparation d'une dérive, ou après un import en masse)
+CREATE OR REPLACE FUNCTION rebuild_grade_summary()
+RETURNS INTEGER AS $$
+DECLARE
+    nb_lignes INTEGER;
+BEGIN
+    LOCK TABLE grade_summary IN EXCLUSIVE MODE;
+    DELETE FROM grade_summary;
+
+    INSERT INTO grade_summary (
+        student_id, assignment_id, meilleure_note, somme_notes, nb_notes,
+        nb_tentatives, derniere_soumission, tests_passed, tests_total
+    )
+    SELECT
+        sub.student_id,
+        sub.assignment_id,
+        MAX(g.note),
+        COALESCE(SUM(g.note), 0),
+        COUNT(g.id),
+        COUNT(DISTINCT sub.id),
+        MAX(sub.submitted_at),
+        MAX(g.tests_passed),
+        MAX(g.tests_total)
+    FROM submissions sub
+    LEFT JOIN grades g ON sub.id = g.submission_id
+    WHERE sub.student_id IS NOT NULL AND sub.assignment_id IS NOT NULL
+    GROUP BY sub.student_id, sub.assignment_id;
+
+    GET DIAGNOSTICS nb_lignes = ROW_COUNT;
+    RETURN nb_lignes;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Remplissage initial à partir des données existantes
+SELECT rebuild_grade_summary();
+
+-- Permissions
+GRANT ALL PRIVILEGES ON grade_summary TO gitea;
+
+-- Commentaires
+COMMENT ON TABLE grade_summary IS 'Résumé des notes par étudiant et TD, maintenu par triggers';
+COMMENT ON FUNCTION refresh_grade_summary(INTEGER, INTEGER) IS 'Recalcule la ligne de résumé d un étudiant pour un TD';
+COMMENT ON FUNCTION rebuild_grade_summary() IS 'Reconstruit entièrement grade_summary (réparation de dérive)';
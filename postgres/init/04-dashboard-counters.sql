@@ -0,0 +1,221 @@
+-- ============================================
+-- Compteurs globaux du dashboard enseignant
+-- ============================================
+-- Une seule ligne, maintenue par des triggers "FOR EACH STATEMENT" (tables de
+-- transition) pour que la lecture des statistiques globales soit en temps
+-- constant, y compris après un import en masse.
+-- Chaque changement sur grades émet NOTIFY grades_changed (invalidation du cache).
+--
+-- Réparer une dérive éventuelle:
+--   docker compose exec -T postgres psql -U gitea -d grades -c "SELECT rebuild_dashboard_counters();"
+
+\c grades;
+
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    total_etudiants INTEGER NOT NULL DEFAULT 0,
+    total_tds INTEGER NOT NULL DEFAULT 0,
+    total_soumissions INTEGER NOT NULL DEFAULT 0,
+    somme_notes DECIMAL(14,2) NOT NULL DEFAULT 0,
+    nb_notes INTEGER NOT NULL DEFAULT 0,
+    nb_couples INTEGER NOT NULL DEFAULT 0, -- couples (étudiant, TD) ayant soumis
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO dashboard_counters (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+-- Étudiants
+CREATE OR REPLACE FUNCTION update_counters_students()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE dashboard_counters SET
+            total_etudiants = total_etudiants + (SELECT COUNT(*) FROM new_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE dashboard_counters SET
+            total_etudiants = total_etudiants - (SELECT COUNT(*) FROM old_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counters_students_insert ON students;
+CREATE TRIGGER trigger_counters_students_insert
+AFTER INSERT ON students
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_students();
+
+DROP TRIGGER IF EXISTS trigger_counters_students_delete ON students;
+CREATE TRIGGER trigger_counters_students_delete
+AFTER DELETE ON students
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_students();
+
+-- TDs
+CREATE OR REPLACE FUNCTION update_counters_assignments()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE dashboard_counters SET
+            total_tds = total_tds + (SELECT COUNT(*) FROM new_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE dashboard_counters SET
+            total_tds = total_tds - (SELECT COUNT(*) FROM old_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counters_assignments_insert ON assignments;
+CREATE TRIGGER trigger_counters_assignments_insert
+AFTER INSERT ON assignments
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_assignments();
+
+DROP TRIGGER IF EXISTS trigger_counters_assignments_delete ON assignments;
+CREATE TRIGGER trigger_counters_assignments_delete
+AFTER DELETE ON assignments
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_assignments();
+
+-- Soumissions
+CREATE OR REPLACE FUNCTION update_counters_submissions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE dashboard_counters SET
+            total_soumissions = total_soumissions + (SELECT COUNT(*) FROM new_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE dashboard_counters SET
+            total_soumissions = total_soumissions - (SELECT COUNT(*) FROM old_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counters_submissions_insert ON submissions;
+CREATE TRIGGER trigger_counters_submissions_insert
+AFTER INSERT ON submissions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_submissions();
+
+DROP TRIGGER IF EXISTS trigger_counters_submissions_delete ON submissions;
+CREATE TRIGGER trigger_counters_submissions_delete
+AFTER DELETE ON submissions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_submissions();
+
+-- Notes (somme et nombre, pour une moyenne exacte)
+CREATE OR REPLACE FUNCTION update_counters_grades()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE dashboard_counters SET
+            somme_notes = somme_notes + (SELECT COALESCE(SUM(note), 0) FROM new_rows),
+            nb_notes = nb_notes + (SELECT COUNT(*) FROM new_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE dashboard_counters SET
+            somme_notes = somme_notes - (SELECT COALESCE(SUM(note), 0) FROM old_rows),
+            nb_notes = nb_notes - (SELECT COUNT(*) FROM old_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+
+    PERFORM pg_notify('grades_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counters_grades_insert ON grades;
+CREATE TRIGGER trigger_counters_grades_insert
+AFTER INSERT ON grades
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_grades();
+
+DROP TRIGGER IF EXISTS trigger_counters_grades_update ON grades;
+CREATE TRIGGER trigger_counters_grades_update
+AFTER UPDATE ON grades
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_grades();
+
+DROP TRIGGER IF EXISTS trigger_counters_grades_delete ON grades;
+CREATE TRIGGER trigger_counters_grades_delete
+AFTER DELETE ON grades
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_grades();
+
+-- Couples (étudiant, TD) ayant soumis, suivis via grade_summary
+CREATE OR REPLACE FUNCTION update_counters_grade_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE dashboard_counters SET
+            nb_couples = nb_couples + (SELECT COUNT(*) FROM new_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE dashboard_counters SET
+            nb_couples = nb_couples - (SELECT COUNT(*) FROM old_rows),
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counters_grade_summary_insert ON grade_summary;
+CREATE TRIGGER trigger_counters_grade_summary_insert
+AFTER INSERT ON grade_summary
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_grade_summary();
+
+DROP TRIGGER IF EXISTS trigger_counters_grade_summary_delete ON grade_summary;
+CREATE TRIGGER trigger_counters_grade_summary_delete
+AFTER DELETE ON grade_summary
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_counters_grade_summary();
+
+-- Recalcul complet à partir d'agrégats indépendants (pas de produit cartésien)
+CREATE OR REPLACE FUNCTION rebuild_dashboard_counters()
+RETURNS VOID AS $$
+BEGIN
+    UPDATE dashboard_counters SET
+        total_etudiants = (SELECT COUNT(*) FROM students),
+        total_tds = (SELECT COUNT(*) FROM assignments),
+        total_soumissions = (SELECT COUNT(*) FROM submissions),
+        somme_notes = (SELECT COALESCE(SUM(note), 0) FROM grades),
+        nb_notes = (SELECT COUNT(*) FROM grades),
+        nb_couples = (SELECT COUNT(*) FROM grade_summary),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id;
+
+    PERFORM pg_notify('grades_changed', 'REBUILD');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Remplissage initial à partir des données existantes
+SELECT rebuild_dashboard_counters();
+
+-- Permissions
+GRANT ALL PRIVILEGES ON dashboard_counters TO gitea;
+
+-- Commentaires
+COMMENT ON TABLE dashboard_counters IS 'Compteurs globaux du dashboard enseignant, maintenus par triggers';
+COMMENT ON FUNCTION rebuild_dashboard_counters() IS 'Recalcule les compteurs globaux (réparation de dérive)';
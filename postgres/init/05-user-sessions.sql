@@ -0,0 +1,23 @@
+-- ============================================
+-- Sessions du Dashboard Grades partagées entre workers/réplicas
+-- ============================================
+-- Utilisée quand SESSION_BACKEND=postgres.
+-- Seul le hash SHA-256 du token de session est stocké.
+
+\c grades;
+
+CREATE TABLE IF NOT EXISTS user_sessions (
+    token_hash CHAR(64) PRIMARY KEY,
+    user_data JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Purge des sessions expirées par parcours d'index
+CREATE INDEX IF NOT EXISTS idx_user_sessions_expires ON user_sessions(expires_at);
+
+-- Permissions
+GRANT ALL PRIVILEGES ON user_sessions TO gitea;
+
+-- Commentaires
+COMMENT ON TABLE user_sessions IS 'Sessions OAuth du dashboard (token hashé), partagées entre workers';
@@ -0,0 +1,125 @@
+-- ============================================
+-- Numéro de version par groupe (cache HTTP du dashboard)
+-- ============================================
+-- Incrémenté dès qu'une donnée affichée par /api/group/{groupe} change:
+-- résumé des notes, étudiants du groupe, ou liste des TDs.
+-- Le dashboard s'en sert comme ETag sans relancer la requête d'agrégation.
+
+\c grades;
+
+CREATE TABLE IF NOT EXISTS group_versions (
+    groupe VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_group_versions(p_groupes VARCHAR[])
+RETURNS VOID AS $$
+    INSERT INTO group_versions (groupe, version)
+    SELECT DISTINCT g, 1 FROM unnest(p_groupes) AS g WHERE g IS NOT NULL
+    ON CONFLICT (groupe) DO UPDATE SET
+        version = group_versions.version + 1,
+        updated_at = CURRENT_TIMESTAMP;
+$$ LANGUAGE sql;
+
+-- Étudiants ajoutés, modifiés (changement de groupe) ou supprimés
+CREATE OR REPLACE FUNCTION update_group_versions_students()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_group_versions(ARRAY(SELECT groupe FROM new_rows));
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM bump_group_versions(ARRAY(SELECT groupe FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_group_versions_students_insert ON students;
+CREATE TRIGGER trigger_group_versions_students_insert
+AFTER INSERT ON students
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_students();
+
+DROP TRIGGER IF EXISTS trigger_group_versions_students_update ON students;
+CREATE TRIGGER trigger_group_versions_students_update
+AFTER UPDATE ON students
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_students();
+
+DROP TRIGGER IF EXISTS trigger_group_versions_students_delete ON students;
+CREATE TRIGGER trigger_group_versions_students_delete
+AFTER DELETE ON students
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_students();
+
+-- Résumé des notes modifié (nouvelle soumission ou nouvelle note)
+CREATE OR REPLACE FUNCTION update_group_versions_grade_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_group_versions(ARRAY(
+            SELECT s.groupe FROM new_rows n JOIN students s ON s.id = n.student_id
+        ));
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM bump_group_versions(ARRAY(
+            SELECT s.groupe FROM old_rows o JOIN students s ON s.id = o.student_id
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_group_versions_summary_insert ON grade_summary;
+CREATE TRIGGER trigger_group_versions_summary_insert
+AFTER INSERT ON grade_summary
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_grade_summary();
+
+DROP TRIGGER IF EXISTS trigger_group_versions_summary_update ON grade_summary;
+CREATE TRIGGER trigger_group_versions_summary_update
+AFTER UPDATE ON grade_summary
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_grade_summary();
+
+DROP TRIGGER IF EXISTS trigger_group_versions_summary_delete ON grade_summary;
+CREATE TRIGGER trigger_group_versions_summary_delete
+AFTER DELETE ON grade_summary
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_grade_summary();
+
+-- Liste des TDs modifiée: toutes les vues de groupe changent
+CREATE OR REPLACE FUNCTION update_group_versions_assignments()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE group_versions SET
+        version = version + 1,
+        updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_group_versions_assignments ON assignments;
+CREATE TRIGGER trigger_group_versions_assignments
+AFTER INSERT OR UPDATE OR DELETE ON assignments
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_group_versions_assignments();
+
+-- Initialisation pour les groupes existants
+INSERT INTO group_versions (groupe)
+SELECT DISTINCT groupe FROM students
+ON CONFLICT (groupe) DO NOTHING;
+
+-- Permissions
+GRANT ALL PRIVILEGES ON group_versions TO gitea;
+
+-- Commentaires
+COMMENT ON TABLE group_versions IS 'Version des données de chaque groupe, utilisée comme ETag par le dashboard';
@@ -0,0 +1,47 @@
+-- ============================================
+-- Notification temps réel des nouvelles notes
+-- ============================================
+-- Chaque note insérée émet NOTIFY new_grade avec un résumé JSON.
+-- Le dashboard écoute ce canal sur une seule connexion et diffuse
+-- les événements (Server-Sent Events) aux vues de groupe abonnées.
+
+\c grades;
+
+CREATE OR REPLACE FUNCTION notify_new_grade()
+RETURNS TRIGGER AS $$
+DECLARE
+    payload JSON;
+BEGIN
+    SELECT json_build_object(
+        'grade_id', NEW.id,
+        'submission_id', NEW.submission_id,
+        'student_id', sub.student_id,
+        'prenom', s.prenom,
+        'nom', s.nom,
+        'groupe', s.groupe,
+        'td_code', a.code,
+        'note', NEW.note,
+        'tests_passed', NEW.tests_passed,
+        'tests_total', NEW.tests_total,
+        'graded_at', NEW.graded_at
+    ) INTO payload
+    FROM submissions sub
+    JOIN students s ON s.id = sub.student_id
+    JOIN assignments a ON a.id = sub.assignment_id
+    WHERE sub.id = NEW.submission_id;
+
+    IF payload IS NOT NULL THEN
+        PERFORM pg_notify('new_grade', payload::text);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_new_grade ON grades;
+CREATE TRIGGER trigger_notify_new_grade
+AFTER INSERT ON grades
+FOR EACH ROW
+EXECUTE FUNCTION notify_new_grade();
+
+COMMENT ON FUNCTION notify_new_grade() IS 'Émet NOTIFY new_grade (JSON) pour le flux temps réel du dashboard';
@@ -0,0 +1,16 @@
+-- ============================================
+-- Emails des étudiants insensibles à la casse
+-- ============================================
+-- Gitea renvoie l'email tel que saisi ("Jean.Dupont@univ.fr"); le
+-- dashboard et l'import (scripts/import_students.py) le comparent en
+-- minuscules. Sur une base existante, appliquer à la main:
+--   psql -U gitea -f postgres/init/08-students-email-lower.sql
+-- La mise en minuscules échoue si deux étudiants ne diffèrent que par la
+-- casse de leur email: fusionner ces lignes avant de relancer.
+
+\c grades;
+
+UPDATE students SET email = lower(email) WHERE email <> lower(email);
+
+-- Unicité sans tenir compte de la casse; arbitre de l'ON CONFLICT de l'import
+CREATE UNIQUE INDEX IF NOT EXISTS idx_students_email_lower ON students (lower(email));
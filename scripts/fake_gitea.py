@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Faux serveur Gitea pour tester update_all_workflows.py en local
+
+Implémente le sous-ensemble de l'API utilisé par le script: organisations,
+repositories d'une organisation (paginés, avec ETag) et contenu d'un
+fichier (GET/PUT). Latence, limitation de débit (429 + Retry-After), taux
+d'erreurs 503 et part des PUT appliqués dont la réponse est perdue sont
+configurables. Les données sont en mémoire.
+
+Usage:
+    python scripts/fake_gitea.py --port 3999 --orgs 10 --repos 40 --latency 20 --rate-limit 50
+    curl http://localhost:3999/_stats
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 d'un blob git (identique à `git hash-object`)"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FakeGitea:
+    """État du faux serveur: organisations, repositories, fichiers et compteurs"""
+
+    def __init__(self, orgs: int, repos: int, existing: float, latency: float, rate_limit: float,
+                 error_rate: float, lost_rate: float = 0.0, seed: int = 42):
+        rng = random.Random(seed)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.lost_rate = lost_rate
+        self.rng = rng
+        self.lock = threading.Lock()
+
+        self.orgs = ["Administration"] + [f"Groupe{i + 1}" for i in range(orgs)]
+        self.repos = {org: [] for org in self.orgs}
+        self.files = {}
+        for org in self.orgs[1:]:
+            for i in range(repos):
+                name = f"etudiant{i + 1:03d}-tds" if i % 10 else f"projet{i + 1:03d}"
+                self.repos[org].append(name)
+                if rng.random() < existing:
+                    self.files[(org, name, ".gitea/workflows/correction.yml")] = b"# ancien workflow\n"
+
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "puts": 0, "gets": 0, "not_modified": 0,
+                      "lost": 0}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def admit(self) -> bool:
+        """Fenêtre glissante d'une seconde: False si le débit maximum est dépassé"""
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count <= self.rate_limit
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "FakeGitea/1.0"
+    gitea: FakeGitea = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload, headers: dict = None, etag: bool = False):
+        body = json.dumps(payload).encode("utf-8")
+        headers = dict(headers or {})
+        if etag:
+            # Comme Gitea derrière un cache: ETag du corps, 304 si inchangé
+            headers["ETag"] = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                with self.gitea.lock:
+                    self.gitea.stats["not_modified"] += 1
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def preamble(self) -> bool:
+        """Latence, authentification, limitation de débit et erreurs aléatoires"""
+        gitea = self.gitea
+        with gitea.lock:
+            gitea.stats["requests"] += 1
+        if gitea.latency:
+            time.sleep(gitea.latency / 1000)
+        if self.path.startswith("/_stats"):
+            return True
+        if not self.headers.get("Authorization", "").startswith("token "):
+            self.send_json(401, {"message": "token is required"})
+            return False
+        if not gitea.admit():
+            with gitea.lock:
+                gitea.stats["throttled"] += 1
+            self.send_json(429, {"message": "rate limit exceeded"}, {"Retry-After": "1"})
+            return False
+        if gitea.error_rate and gitea.rng.random() < gitea.error_rate:
+            with gitea.lock:
+                gitea.stats["errors"] += 1
+            self.send_json(503, {"message": "service unavailable"})
+            return False
+        return True
+
+    def paginate(self, items: list, query: dict):
+        page = max(1, int(query.get("page", ["1"])[0]))
+        limit = min(50, max(1, int(query.get("limit", ["30"])[0])))
+        start = (page - 1) * limit
+        return items[start:start + limit], {"X-Total-Count": str(len(items))}
+
+    def do_GET(self):
+        if not self.preamble():
+            return
+        gitea = self.gitea
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+
+        if url.path == "/_stats":
+            self.send_json(200, {**gitea.stats, "files": len(gitea.files)})
+        elif parts[:3] == ["api", "v1", "orgs"] and len(parts) == 3:
+            page, headers = self.paginate([{"username": org} for org in gitea.orgs], query)
+            self.send_json(200, page, headers, etag=True)
+        elif parts[:3] == ["api", "v1", "orgs"] and len(parts) == 5 and parts[4] == "repos":
+            org = parts[3]
+            if org not in gitea.repos:
+                self.send_json(404, {"message": "org not found"})
+                return
+            repos = [{"name": name, "full_name": f"{org}/{name}"} for name in gitea.repos[org]]
+            page, headers = self.paginate(repos, query)
+            self.send_json(200, page, headers, etag=True)
+        elif parts[:3] == ["api", "v1", "repos"] and len(parts) > 6 and parts[5] == "contents":
+            with gitea.lock:
+                gitea.stats["gets"] += 1
+            data = gitea.files.get((parts[3], parts[4], "/".join(parts[6:])))
+            if data is None:
+                self.send_json(404, {"message": "file not found"})
+                return
+            self.send_json(200, {
+                "type": "file",
+                "encoding": "base64",
+                "size": len(data),
+                "sha": git_blob_sha(data),
+                "content": base64.b64encode(data).decode("ascii")
+            })
+        else:
+            self.send_json(404, {"message": "not found"})
+
+    def do_PUT(self):
+        if not self.preamble():
+            return
+        gitea = self.gitea
+        parts = urlparse(self.path).path.strip("/").split("/")
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if not (parts[:3] == ["api", "v1", "repos"] and len(parts) > 6 and parts[5] == "contents"):
+            self.send_json(404, {"message": "not found"})
+            return
+        if parts[4] not in gitea.repos.get(parts[3], []):
+            self.send_json(404, {"message": "repo not found"})
+            return
+
+        key = (parts[3], parts[4], "/".join(parts[6:]))
+        try:
+            data = base64.b64decode(payload.get("content", ""), validate=True)
+        except ValueError:
+            self.send_json(422, {"message": "content must be base64 encoded"})
+            return
+
+        with gitea.lock:
+            gitea.stats["puts"] += 1
+            current = gitea.files.get(key)
+            if current is not None and payload.get("sha") != git_blob_sha(current):
+                self.send_json(409, {"message": "sha does not match"})
+                return
+            gitea.files[key] = data
+            # Commit appliqué mais réponse perdue (le client ne le sait pas)
+            lost = gitea.lost_rate and gitea.rng.random() < gitea.lost_rate
+            if lost:
+                gitea.stats["lost"] += 1
+        if lost:
+            self.send_json(503, {"message": "service unavailable"})
+            return
+        self.send_json(200 if current is not None else 201, {"content": {"sha": git_blob_sha(data)}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux serveur Gitea (tests de update_all_workflows.py)")
+    parser.add_argument("--port", type=int, default=3999)
+    parser.add_argument("--orgs", type=int, default=10, help="Nombre d'organisations (hors Administration)")
+    parser.add_argument("--repos", type=int, default=40, help="Repositories par organisation")
+    parser.add_argument("--existing", type=float, default=0.5, help="Part des repos ayant déjà un workflow")
+    parser.add_argument("--latency", type=float, default=20, help="Latence ajoutée par requête (ms)")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requêtes/s avant 429 (0: illimité)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Part de réponses 503 aléatoires")
+    parser.add_argument("--lost-rate", type=float, default=0,
+                        help="Part des PUT appliqués mais répondus en 503 (réponse perdue)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Handler.gitea = FakeGitea(args.orgs, args.repos, args.existing, args.latency, args.rate_limit,
+                              args.error_rate, args.lost_rate, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"🧪 Faux Gitea sur http://127.0.0.1:{args.port} "
+          f"({args.orgs} organisations × {args.repos} repositories)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,85 @@
 """
 Script pour mettre à jour le workflow de correction dans tous les repositories étudiants
 Ajoute la vérification de la limite de 5 tentatives
+
+Les mises à jour sont envoyées en parallèle (pool de workers borné) sur une
+session HTTP partagée. Un limiteur de débit adaptatif (seau à jetons)
+remplace la pause fixe entre deux repositories: il ralentit quand Gitea
+répond 429/503 et accélère tant que tout va bien. Les erreurs réseau et 5xx
+sont retentées avec un délai exponentiel.
+
+La découverte parcourt toutes les pages des listages Gitea, liste les
+organisations en parallèle et alimente les mises à jour au fil de l'eau.
+L'inventaire obtenu est gardé sur disque: une relance dans les
+--inventory-ttl secondes saute le scan, au-delà les pages sont revalidées
+par ETag (If-None-Match → 304).
+
+Avant d'écrire, le SHA du blob git du template est comparé au `sha` du
+fichier distant: les repositories déjà à jour sont ignorés (aucun commit,
+donc aucune correction déclenchée). --dry-run compare sans écrire, --diff
+affiche les différences.
+
+Chaque résultat est journalisé dans SQLite (--journal) avec les
+statistiques de l'exécution (débit, latences). Après une interruption:
+--resume ignore les repositories déjà à jour, --retry-failed ne relance
+que les échecs, --stats affiche les dernières exécutions.
+
+Usage:
+    GITEA_ADMIN_TOKEN=... python scripts/update_all_workflows.py --workers 8 --rate 10
+
+Test en local contre un faux Gitea (voir scripts/fake_gitea.py):
+    python scripts/fake_gitea.py --port 3999 &
+    python scripts/update_all_workflows.py --url http://localhost:3999 --token test --yes
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import argparse
+import base64
+import difflib
+import hashlib
+import json
+import os
+import queue
+import random
 import requests
+import sqlite3
+import statistics
 import sys
+import threading
 import time
-from typing import List, Dict
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 
 # Configuration
-GITEA_URL = "https://git.zohrabi.cloud"
-GITEA_ADMIN_TOKEN = ""  # À remplir avec votre token admin
+GITEA_URL = os.getenv("GITEA_URL", "https://git.zohrabi.cloud")
+GITEA_ADMIN_TOKEN = os.getenv("GITEA_ADMIN_TOKEN", "")  # À remplir avec votre token admin
 WORKFLOW_FILE_PATH = ".gitea/workflows/correction.yml"
+WORKFLOW_TEMPLATE_PATH = ".gitea/workflows/correction.yml"
+COMMIT_MESSAGE = "Update: Add 5 attempts limit to correction workflow"
+
+# Parallélisme et limitation de débit
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0       # requêtes/seconde au démarrage
+DEFAULT_MAX_RATE = 50.0   # plafond atteint progressivement si Gitea suit
+MIN_RATE = 0.5
+DEFAULT_RETRIES = 4
+REQUEST_TIMEOUT = 30
+
+# Découverte des repositories
+PAGE_LIMIT = 50           # maximum accepté par Gitea (MAX_RESPONSE_ITEMS)
+DEFAULT_DISCOVERY_WORKERS = 4
+INVENTORY_PATH = os.getenv("ROLLOUT_INVENTORY", ".rollout-inventory.json")
+INVENTORY_TTL = 900.0     # secondes
+JOURNAL_PATH = os.getenv("ROLLOUT_JOURNAL", ".rollout-journal.sqlite3")
+
+# Codes HTTP retentés (surcharge ou indisponibilité temporaire); seuls 429
+# et 503 avec Retry-After font baisser le débit
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Méthodes rejouées sur erreur réseau/5xx: un PUT dont la réponse est perdue
+# a pu être appliqué (voir update_workflow). 429 est rejoué pour toutes les
+# méthodes: la requête a été refusée avant traitement.
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
 
 # Nouveau contenu du workflow (avec limitation de tentatives)
 NEW_WORKFLOW_CONTENT = """
@@ -69,197 +137,779 @@ jobs:
       # ... (reste du workflow identique)
 """
 
-def get_all_student_repos() -> List[Dict]:
-    """Récupère tous les repositories étudiants"""
-    headers = {
-        "Authorization": f"token {GITEA_ADMIN_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    all_repos = []
-    
-    # Récupérer toutes les organisations (groupes)
-    orgs_response = requests.get(
-        f"{GITEA_URL}/api/v1/orgs",
-        headers=headers
-    )
-    
-    if orgs_response.status_code != 200:
-        print(f"❌ Erreur récupération organisations: {orgs_response.status_code}")
-        return []
-    
-    orgs = orgs_response.json()
-    
-    # Pour chaque organisation, récupérer les repos
-    for org in orgs:
-        org_name = org["username"]
-        
-        # Ignorer l'organisation "Administration" (enseignants)
-        if org_name == "Administration":
-            continue
-        
-        print(f"📁 Organisation: {org_name}")
-        
-        repos_response = requests.get(
-            f"{GITEA_URL}/api/v1/orgs/{org_name}/repos",
-            headers=headers
-        )
-        
-        if repos_response.status_code == 200:
-            repos = repos_response.json()
-            for repo in repos:
-                # Filtrer les repos étudiants (format: nom-tds)
-                if "-tds" in repo["name"]:
-                    all_repos.append({
-                        "owner": org_name,
-                        "name": repo["name"],
-                        "full_name": repo["full_name"]
-                    })
-    
-    return all_repos
+class TokenBucket:
+    """
+    Limiteur de débit adaptatif partagé entre les workers.
 
-def check_workflow_exists(owner: str, repo_name: str) -> bool:
-    """Vérifie si le workflow existe déjà"""
-    headers = {
-        "Authorization": f"token {GITEA_ADMIN_TOKEN}"
-    }
-    
-    response = requests.get(
-        f"{GITEA_URL}/api/v1/repos/{owner}/{repo_name}/contents/{WORKFLOW_FILE_PATH}",
-        headers=headers
-    )
-    
-    return response.status_code == 200
+    Augmentation additive (environ +rate_step req/s par seconde de succès)
+    et diminution multiplicative (débit divisé par 2 quand Gitea signale une
+    surcharge, au plus une fois par seconde: une rafale de 429 ne compte
+    qu'une fois), dans [MIN_RATE, max_rate].
+    """
 
-def get_file_sha(owner: str, repo_name: str, file_path: str) -> str:
-    """Récupère le SHA d'un fichier existant"""
-    headers = {
-        "Authorization": f"token {GITEA_ADMIN_TOKEN}"
-    }
-    
-    response = requests.get(
-        f"{GITEA_URL}/api/v1/repos/{owner}/{repo_name}/contents/{file_path}",
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        return response.json().get("sha", "")
-    return ""
-
-def update_workflow(owner: str, repo_name: str, workflow_content: str) -> bool:
-    """Met à jour le workflow dans un repository"""
-    headers = {
-        "Authorization": f"token {GITEA_ADMIN_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    # Lire le workflow depuis un fichier template
+    def __init__(self, rate: float, max_rate: float, rate_step: float = 2.0):
+        self.rate = rate
+        self.max_rate = max(rate, max_rate)
+        self.rate_step = rate_step
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.updated = now
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.rate_step / self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease >= 1:
+                self.rate = max(MIN_RATE, self.rate / 2)
+                self.last_decrease = now
+            self.tokens = 0.0
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+class GiteaClient:
+    """Session HTTP partagée (keep-alive) avec limitation de débit et retries"""
+
+    def __init__(self, url: str, token: str, workers: int, bucket: TokenBucket, retries: int = DEFAULT_RETRIES):
+        self.url = url.rstrip("/")
+        self.bucket = bucket
+        self.retries = retries
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"token {token}",
+            "Content-Type": "application/json"
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Compteurs partagés par les workers de mise à jour et de découverte
+        self.lock = threading.Lock()
+        self.requests_sent = 0
+        self.retried = 0
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Requête avec attente d'un jeton; retries exponentiels sur 429, et sur
+        erreur réseau/5xx pour les méthodes idempotentes
+        """
+        idempotent = method in IDEMPOTENT_METHODS
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            with self.lock:
+                self.requests_sent += 1
+            try:
+                response = self.session.request(method, f"{self.url}{path}", timeout=REQUEST_TIMEOUT, **kwargs)
+            except requests.RequestException:
+                if attempt == self.retries or not idempotent:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.bucket.on_success()
+                    return response
+                retry_after = retry_after_seconds(response)
+                if response.status_code == 429 or retry_after is not None:
+                    self.bucket.on_throttle(retry_after)
+                if attempt == self.retries or (not idempotent and response.status_code != 429):
+                    return response
+            with self.lock:
+                self.retried += 1
+            # Backoff exponentiel avec jitter: 0.5s, 1s, 2s, 4s... (±50%)
+            time.sleep(0.5 * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def load_workflow_template(path: str = WORKFLOW_TEMPLATE_PATH) -> str:
+    """Lit le workflow depuis le fichier template (une seule fois par exécution)"""
     try:
-        with open(".gitea/workflows/correction.yml", "r") as f:
-            workflow_content = f.read()
+        with open(path, "r") as f:
+            return f.read()
     except FileNotFoundError:
         print(f"⚠️  Fichier template non trouvé, utilisation du contenu par défaut")
-        workflow_content = NEW_WORKFLOW_CONTENT
-    
-    # Vérifier si le fichier existe
-    file_sha = get_file_sha(owner, repo_name, WORKFLOW_FILE_PATH)
-    
-    data = {
-        "message": "Update: Add 5 attempts limit to correction workflow",
-        "content": workflow_content,
-        "branch": "main"
-    }
-    
-    # Si le fichier existe, ajouter le SHA pour la mise à jour
-    if file_sha:
-        data["sha"] = file_sha
-        print(f"  ↻ Mise à jour du workflow existant...")
+        return NEW_WORKFLOW_CONTENT
+
+
+class DiscoveryError(Exception):
+    """Une page de l'API de listage n'a pas pu être récupérée"""
+
+
+class RepoInventory:
+    """
+    Inventaire des repositories en cache sur disque (JSON).
+
+    Conserve chaque page listée avec son ETag: une relance renvoie
+    If-None-Match et réutilise la page sur 304. Tant que l'inventaire est
+    plus récent que --inventory-ttl, le scan est entièrement sauté.
+    """
+
+    def __init__(self, path: Optional[str], url: str):
+        self.path = path
+        self.url = url
+        self.pages: Dict[str, Dict] = {}
+        self.repos: List[Dict] = []
+        self.scanned_at = 0.0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+    def load(self) -> "RepoInventory":
+        if not self.path:
+            return self
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Inventaire {self.path} illisible, ignoré: {e}")
+            return self
+        # Un inventaire d'une autre instance Gitea ne sert à rien
+        if data.get("url") == self.url:
+            self.pages = data.get("pages", {})
+            self.repos = data.get("repos", [])
+            self.scanned_at = data.get("scanned_at", 0.0)
+        return self
+
+    def age(self) -> float:
+        return time.time() - self.scanned_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        return bool(self.repos) and self.age() < ttl
+
+    def cached_page(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            return self.pages.get(key)
+
+    def store_page(self, key: str, etag: Optional[str], items: List[Dict], total: Optional[int]):
+        with self.lock:
+            if etag:
+                self.pages[key] = {"etag": etag, "items": items, "total": total}
+            else:
+                self.pages.pop(key, None)
+
+    def save(self, repos: List[Dict]):
+        self.repos = repos
+        self.scanned_at = time.time()
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            data = {"url": self.url, "scanned_at": self.scanned_at, "repos": repos, "pages": self.pages}
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+def iter_pages(client: GiteaClient, path: str, inventory: RepoInventory,
+               fields: Tuple[str, ...]) -> Iterator[List[Dict]]:
+    """
+    Parcourt toutes les pages d'un listage Gitea (page/limit)
+
+    S'arrête sur une page incomplète ou quand X-Total-Count est atteint.
+    Seuls `fields` sont gardés de chaque élément (taille de l'inventaire).
+    """
+    page = 1
+    while True:
+        key = f"{path}?page={page}&limit={PAGE_LIMIT}"
+        cached = inventory.cached_page(key)
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        response = client.get(path, params={"page": page, "limit": PAGE_LIMIT}, headers=headers)
+
+        if response.status_code == 304 and cached:
+            with inventory.lock:
+                inventory.not_modified += 1
+            items, total = cached["items"], cached.get("total")
+        elif response.status_code == 200:
+            items = [{field: item[field] for field in fields} for item in response.json()]
+            total = int(response.headers["X-Total-Count"]) if "X-Total-Count" in response.headers else None
+            inventory.store_page(key, response.headers.get("ETag"), items, total)
+        else:
+            raise DiscoveryError(f"{path} (page {page}): {response.status_code}")
+
+        if items:
+            yield items
+        if len(items) < PAGE_LIMIT or (total is not None and page * PAGE_LIMIT >= total):
+            return
+        page += 1
+
+
+def discover_student_repos(client: GiteaClient, inventory: RepoInventory, workers: int,
+                           errors: List[str]) -> Iterator[Dict]:
+    """
+    Découvre les repositories étudiants au fil de l'eau
+
+    Les organisations sont listées en parallèle; chaque repository est
+    produit dès que sa page est reçue, ce qui permet de commencer les mises
+    à jour pendant le scan. Les organisations en échec sont ajoutées à
+    `errors`; l'inventaire n'est enregistré que si le scan est complet.
+    """
+    # Récupérer toutes les organisations (groupes)
+    try:
+        orgs = [
+            org["username"]
+            for page in iter_pages(client, "/api/v1/orgs", inventory, ("username",))
+            for org in page
+            # Ignorer l'organisation "Administration" (enseignants)
+            if org["username"] != "Administration"
+        ]
+    except requests.RequestException as e:
+        raise DiscoveryError(f"/api/v1/orgs: {e}") from e
+
+    found: "queue.Queue[Optional[Dict]]" = queue.Queue()
+
+    def scan(org_name: str):
+        try:
+            pages = iter_pages(client, f"/api/v1/orgs/{org_name}/repos", inventory, ("name", "full_name"))
+            for page in pages:
+                for repo in page:
+                    # Filtrer les repos étudiants (format: nom-tds)
+                    if "-tds" in repo["name"]:
+                        found.put({"owner": org_name, "name": repo["name"], "full_name": repo["full_name"]})
+        except (DiscoveryError, requests.RequestException) as e:
+            errors.append(f"{org_name}: {e}")
+        finally:
+            found.put(None)
+
+    repos = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="discovery") as pool:
+        for org_name in orgs:
+            pool.submit(scan, org_name)
+        remaining = len(orgs)
+        while remaining:
+            repo = found.get()
+            if repo is None:
+                remaining -= 1
+                continue
+            repos.append(repo)
+            yield repo
+
+    if not errors:
+        inventory.save(repos)
+
+class RolloutJournal:
+    """
+    Journal SQLite des résultats par repository, écrit au fil de l'eau.
+
+    Chaque exécution (runs) garde ses résultats (outcomes) et ses
+    statistiques; repo_state retient le dernier résultat de chaque
+    repository pour un template donné. Après une interruption, --resume
+    ignore les repositories déjà à jour et --retry-failed ne relance que
+    les échecs. Les simulations (--dry-run) ne modifient pas repo_state.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            template_sha TEXT NOT NULL,
+            dry_run INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            repos INTEGER, changed INTEGER, unchanged INTEGER, failed INTEGER, skipped INTEGER,
+            elapsed REAL, repos_per_s REAL, requests INTEGER, retried INTEGER,
+            p50_ms REAL, p95_ms REAL, max_ms REAL
+        );
+        CREATE TABLE IF NOT EXISTS outcomes (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            full_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            duration REAL,
+            recorded_at REAL NOT NULL,
+            PRIMARY KEY (run_id, full_name)
+        );
+        CREATE TABLE IF NOT EXISTS repo_state (
+            url TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            owner TEXT NOT NULL,
+            name TEXT NOT NULL,
+            template_sha TEXT NOT NULL,
+            status TEXT NOT NULL,
+            run_id INTEGER NOT NULL,
+            PRIMARY KEY (url, full_name)
+        );
+    """
+
+    def __init__(self, path: str, url: str):
+        self.url = url
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL: chaque résultat est commité sans ralentir les workers
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def start_run(self, template_sha: str, dry_run: bool) -> int:
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (url, template_sha, dry_run, started_at) VALUES (?, ?, ?, ?)",
+                (self.url, template_sha, int(dry_run), time.time())
+            )
+            return cursor.lastrowid
+
+    def record(self, run_id: int, template_sha: str, result: Dict):
+        owner, name = result["full_name"].split("/", 1)
+        with self.lock:
+            # Après un second Ctrl-C, des requêtes en cours peuvent finir
+            # après la fermeture: le SHA les fera classer "identique" à la reprise
+            if self.conn is None:
+                return
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, result["full_name"], result["status"], result["error"], result["duration"], time.time())
+                )
+                if not result.get("dry_run"):
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO repo_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (self.url, result["full_name"], owner, name, template_sha, result["status"], run_id)
+                    )
+
+    def finish_run(self, run_id: int, status: str, stats: Dict):
+        columns = ", ".join(f"{column} = ?" for column in stats)
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"UPDATE runs SET status = ?, finished_at = ?, {columns} WHERE id = ?",
+                (status, time.time(), *stats.values(), run_id)
+            )
+
+    def succeeded(self, template_sha: str) -> set:
+        """Repositories déjà à jour avec ce template"""
+        rows = self.conn.execute(
+            "SELECT full_name FROM repo_state WHERE url = ? AND template_sha = ? AND status != 'failed'",
+            (self.url, template_sha)
+        )
+        return {full_name for full_name, in rows}
+
+    def failed(self, template_sha: str) -> List[Dict]:
+        """Repositories dont la dernière mise à jour avec ce template a échoué"""
+        rows = self.conn.execute(
+            "SELECT owner, name, full_name FROM repo_state "
+            "WHERE url = ? AND template_sha = ? AND status = 'failed' ORDER BY full_name",
+            (self.url, template_sha)
+        )
+        return [{"owner": owner, "name": name, "full_name": full_name} for owner, name, full_name in rows]
+
+    def runs(self, limit: int = 10) -> List[Dict]:
+        cursor = self.conn.execute(
+            "SELECT * FROM runs WHERE url = ? ORDER BY id DESC LIMIT ?", (self.url, limit)
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+            self.conn = None
+
+
+def run_stats(results: List[Dict], skipped: int, elapsed: float, client: GiteaClient) -> Dict:
+    """Statistiques d'une exécution: compteurs, débit et latences par repository (ms)"""
+    durations = [r["duration"] for r in results]
+    if len(durations) > 1:
+        # Vingtiles: cuts[9] = p50, cuts[18] = p95
+        cuts = statistics.quantiles(durations, n=20, method="inclusive")
+        p50, p95 = cuts[9], cuts[18]
+    elif durations:
+        # quantiles() exige deux valeurs: une seule mesure est son propre p50 et p95
+        p50 = p95 = durations[0]
     else:
-        print(f"  + Création du workflow...")
-    
-    response = requests.put(
-        f"{GITEA_URL}/api/v1/repos/{owner}/{repo_name}/contents/{WORKFLOW_FILE_PATH}",
-        headers=headers,
-        json=data
+        p50 = p95 = 0.0
+    return {
+        "repos": len(results),
+        "changed": sum(1 for r in results if r["status"] in ("created", "updated")),
+        "unchanged": sum(1 for r in results if r["status"] == "unchanged"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "skipped": skipped,
+        "elapsed": elapsed,
+        "repos_per_s": len(results) / elapsed if elapsed else 0.0,
+        "requests": client.requests_sent,
+        "retried": client.retried,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "max_ms": max(durations, default=0.0) * 1000,
+    }
+
+
+def print_runs(runs: List[Dict]):
+    print(f"{'Run':>4}  {'Début':<16} {'Statut':<12} {'Repos':>6} {'Modif.':>6} {'Ident.':>6} {'Échecs':>6} "
+          f"{'Ignorés':>7} {'Durée':>7} {'Repos/s':>7} {'p50':>8} {'p95':>8}")
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started_at"]))
+        status = run["status"] + (" (sim.)" if run["dry_run"] else "")
+        if run["finished_at"] is None:
+            print(f"{run['id']:>4}  {started:<16} {'interrompu':<12}")
+            continue
+        print(f"{run['id']:>4}  {started:<16} {status:<12} {run['repos']:>6} {run['changed']:>6} "
+              f"{run['unchanged']:>6} {run['failed']:>6} {run['skipped']:>7} {run['elapsed']:>6.1f}s "
+              f"{run['repos_per_s']:>7.1f} {run['p50_ms']:>6.0f}ms {run['p95_ms']:>6.0f}ms")
+
+
+def skip_completed(repos: Iterable[Dict], completed: set, skipped: List[str]) -> Iterator[Dict]:
+    """Filtre les repositories déjà à jour d'après le journal (ajoutés à `skipped`)"""
+    for repo in repos:
+        if repo["full_name"] in completed:
+            skipped.append(repo["full_name"])
+        else:
+            yield repo
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 d'un blob git (identique à `git hash-object`), comparable au `sha` de l'API contents"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def get_remote_file(client: GiteaClient, owner: str, repo_name: str, file_path: str) -> Optional[Dict]:
+    """SHA et contenu décodé d'un fichier; None s'il n'existe pas"""
+    response = client.get(f"/api/v1/repos/{owner}/{repo_name}/contents/{file_path}")
+
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise requests.HTTPError(f"{response.status_code} - {response.text[:200]}", response=response)
+    data = response.json()
+    return {"sha": data.get("sha", ""), "content": base64.b64decode(data.get("content") or "")}
+
+def workflow_diff(full_name: str, remote: Optional[bytes], local: bytes) -> str:
+    """Diff unifié entre le workflow du repository et le template"""
+    before = remote.decode("utf-8", errors="replace").splitlines(keepends=True) if remote is not None else []
+    lines = difflib.unified_diff(
+        before, local.decode("utf-8").splitlines(keepends=True),
+        fromfile=f"{full_name}/{WORKFLOW_FILE_PATH}" if remote is not None else "/dev/null",
+        tofile=f"template/{WORKFLOW_FILE_PATH}"
     )
-    
-    if response.status_code in [200, 201]:
-        print(f"  ✅ Workflow mis à jour")
-        return True
-    else:
-        print(f"  ❌ Erreur: {response.status_code} - {response.text}")
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+
+def workflow_applied(client: GiteaClient, owner: str, repo_name: str, local: bytes) -> bool:
+    """Relit le workflow distant: True s'il est identique au template"""
+    try:
+        remote = get_remote_file(client, owner, repo_name, WORKFLOW_FILE_PATH)
+    except requests.RequestException:
         return False
+    return remote is not None and remote["sha"] == git_blob_sha(local)
+
+def update_workflow(client: GiteaClient, owner: str, repo_name: str, workflow_content: str,
+                    dry_run: bool = False, show_diff: bool = False) -> Dict:
+    """
+    Met à jour le workflow dans un repository; retourne le résultat
+
+    Le SHA du blob local est comparé à celui du fichier distant: un workflow
+    déjà identique n'est pas réécrit (pas de commit, donc pas de correction
+    déclenchée par le push ni de tentative consommée).
+    """
+    start = time.perf_counter()
+    full_name = f"{owner}/{repo_name}"
+    result = {"full_name": full_name, "status": "failed", "error": None, "dry_run": dry_run}
+    local = workflow_content.encode("utf-8")
+
+    try:
+        # Vérifier si le fichier existe et s'il diffère du template
+        remote = get_remote_file(client, owner, repo_name, WORKFLOW_FILE_PATH)
+
+        if remote is not None and remote["sha"] == git_blob_sha(local):
+            result["status"] = "unchanged"
+        else:
+            if show_diff:
+                result["diff"] = workflow_diff(full_name, remote["content"] if remote else None, local)
+            if dry_run:
+                result["status"] = "updated" if remote else "created"
+            else:
+                # L'API contents de Gitea attend le contenu encodé en base64
+                data = {
+                    "message": COMMIT_MESSAGE,
+                    "content": base64.b64encode(local).decode("ascii"),
+                    "branch": "main"
+                }
+
+                # Si le fichier existe, ajouter le SHA pour la mise à jour
+                if remote:
+                    data["sha"] = remote["sha"]
+
+                try:
+                    response = client.put(f"/api/v1/repos/{owner}/{repo_name}/contents/{WORKFLOW_FILE_PATH}", json=data)
+                    error = None
+                    if response.status_code not in [200, 201]:
+                        error = f"{response.status_code} - {response.text[:200]}"
+                except requests.RequestException as e:
+                    error = str(e)
+
+                # Réponse perdue ou en erreur: le commit a pu être appliqué quand même
+                if error is None or workflow_applied(client, owner, repo_name, local):
+                    result["status"] = "updated" if remote else "created"
+                else:
+                    result["error"] = error
+    except requests.RequestException as e:
+        result["error"] = str(e)
+
+    result["duration"] = time.perf_counter() - start
+    return result
+
+def rollout(client: GiteaClient, repos: Iterable[Dict], workflow_content: str, workers: int,
+            dry_run: bool = False, show_diff: bool = False,
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    Met à jour tous les repositories avec un pool de workers borné
+
+    `repos` peut être un générateur (découverte en cours): chaque
+    repository est soumis dès qu'il est connu. `on_result` est appelé pour
+    chaque résultat (journal). Sur Ctrl-C, les mises à jour non commencées
+    sont annulées et celles en cours terminées avant de propager
+    l'interruption.
+    """
+    results = []
+    submitted = 0
+    lock = threading.Lock()
+
+    def done(future):
+        if future.cancelled():
+            return
+        with lock:
+            results.append(future.result())
+            print_result(len(results), submitted, results[-1])
+            if on_result:
+                on_result(results[-1])
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rollout")
+    try:
+        for repo in repos:
+            with lock:
+                submitted += 1
+            future = pool.submit(update_workflow, client, repo["owner"], repo["name"], workflow_content,
+                                 dry_run, show_diff)
+            future.add_done_callback(done)
+        pool.shutdown(wait=True)
+    except BaseException as e:
+        if isinstance(e, KeyboardInterrupt):
+            print("⏹️  Interruption: fin des mises à jour en cours...")
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    return results
+
+def print_result(i: int, total: int, result: Dict):
+    simulated = " (simulation)" if result.get("dry_run") else ""
+    if result["status"] == "created":
+        print(f"[{i}/{total}] {result['full_name']}  + Workflow créé{simulated} ({result['duration']:.2f}s)")
+    elif result["status"] == "updated":
+        print(f"[{i}/{total}] {result['full_name']}  ↻ Workflow mis à jour{simulated} ({result['duration']:.2f}s)")
+    elif result["status"] == "unchanged":
+        print(f"[{i}/{total}] {result['full_name']}  = Workflow identique, ignoré ({result['duration']:.2f}s)")
+    else:
+        print(f"[{i}/{total}] {result['full_name']}  ❌ Erreur: {result['error']}")
+    if result.get("diff"):
+        print(result["diff"], end="")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Met à jour le workflow de correction dans tous les repositories étudiants")
+    parser.add_argument("--url", default=GITEA_URL, help=f"URL de Gitea (défaut: {GITEA_URL})")
+    parser.add_argument("--token", default=GITEA_ADMIN_TOKEN, help="Token admin (défaut: $GITEA_ADMIN_TOKEN)")
+    parser.add_argument("--template", default=WORKFLOW_TEMPLATE_PATH, help="Fichier workflow à déployer")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Mises à jour en parallèle")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Débit initial (requêtes/s)")
+    parser.add_argument("--max-rate", type=float, default=DEFAULT_MAX_RATE, help="Débit maximum (requêtes/s)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Tentatives supplémentaires par requête")
+    parser.add_argument("--discovery-workers", type=int, default=DEFAULT_DISCOVERY_WORKERS,
+                        help="Organisations listées en parallèle")
+    parser.add_argument("--inventory", default=INVENTORY_PATH,
+                        help=f"Inventaire des repositories en cache (défaut: {INVENTORY_PATH}, vide: désactivé)")
+    parser.add_argument("--inventory-ttl", type=float, default=INVENTORY_TTL,
+                        help="Âge max (s) de l'inventaire pour sauter le scan; au-delà, revalidation par ETag")
+    parser.add_argument("--rescan", action="store_true", help="Ignore l'inventaire en cache et relit tout")
+    parser.add_argument("--journal", default=JOURNAL_PATH,
+                        help=f"Journal SQLite des résultats (défaut: {JOURNAL_PATH}, vide: désactivé)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Ignore les repositories déjà à jour avec ce template d'après le journal")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Ne relance que les repositories en échec dans le journal (sans découverte)")
+    parser.add_argument("--stats", action="store_true", help="Affiche les dernières exécutions du journal et quitte")
+    parser.add_argument("--dry-run", action="store_true", help="Compare sans rien écrire dans les repositories")
+    parser.add_argument("--diff", action="store_true", help="Affiche le diff des workflows modifiés")
+    parser.add_argument("--yes", "-y", action="store_true", help="Ne pas demander de confirmation")
+    return parser.parse_args()
 
 def main():
-    if not GITEA_ADMIN_TOKEN:
+    args = parse_args()
+
+    if (args.resume or args.retry_failed or args.stats) and not args.journal:
+        print("❌ Erreur: --resume, --retry-failed et --stats nécessitent --journal")
+        sys.exit(1)
+
+    if args.stats:
+        journal = RolloutJournal(args.journal, args.url.rstrip("/"))
+        print_runs(journal.runs())
+        journal.close()
+        return
+
+    if not args.token:
         print("❌ Erreur: GITEA_ADMIN_TOKEN non défini")
         print("Récupérez un token admin depuis: Gitea > Settings > Applications > Generate Token")
         sys.exit(1)
-    
+
+    bucket = TokenBucket(args.rate, args.max_rate)
+    client = GiteaClient(args.url, args.token, args.workers + args.discovery_workers, bucket, retries=args.retries)
+    workflow_content = load_workflow_template(args.template)
+    template_sha = git_blob_sha(workflow_content.encode("utf-8"))
+    inventory = RepoInventory(args.inventory, client.url)
+    if not args.rescan:
+        inventory.load()
+    journal = RolloutJournal(args.journal, client.url) if args.journal else None
+
     print("🚀 Mise à jour des workflows de correction")
     print("=" * 50)
     print()
-    
-    # Récupérer tous les repos étudiants
-    print("📋 Récupération des repositories étudiants...")
-    repos = get_all_student_repos()
-    
-    if not repos:
-        print("⚠️  Aucun repository trouvé")
-        sys.exit(0)
-    
-    print(f"✅ {len(repos)} repositories trouvés")
+
+    # Récupérer tous les repos étudiants: échecs du journal, inventaire récent,
+    # sinon scan au fil de l'eau
+    discovery_errors: List[str] = []
+    if args.retry_failed:
+        repos = journal.failed(template_sha)
+        print(f"🔁 {len(repos)} repositories en échec dans le journal (template {template_sha[:10]})")
+    elif inventory.is_fresh(args.inventory_ttl):
+        repos = inventory.repos
+        print(f"📦 Inventaire en cache: {len(repos)} repositories (scanné il y a {inventory.age():.0f}s)")
+    else:
+        print(f"📋 Découverte des repositories étudiants ({args.discovery_workers} organisations en parallèle)...")
+        repos = discover_student_repos(client, inventory, args.discovery_workers, discovery_errors)
+
+    skipped: List[str] = []
+    if args.resume:
+        repos = skip_completed(repos, journal.succeeded(template_sha), skipped)
+        print("⏭️  Reprise: les repositories déjà à jour d'après le journal sont ignorés")
     print()
-    
+
     # Confirmation
-    print("⚠️  Cette opération va mettre à jour le workflow dans TOUS les repositories étudiants")
-    response = input("Continuer ? (y/n): ")
-    
-    if response.lower() != 'y':
-        print("❌ Opération annulée")
-        sys.exit(0)
-    
+    if not args.yes and not args.dry_run:
+        print("⚠️  Cette opération va mettre à jour le workflow dans TOUS les repositories étudiants")
+        response = input("Continuer ? (y/n): ")
+
+        if response.lower() != 'y':
+            print("❌ Opération annulée")
+            sys.exit(0)
+
     print()
-    print("🔄 Mise à jour en cours...")
+    if args.dry_run:
+        print(f"🔍 Simulation: comparaison avec le template ({args.workers} workers)...")
+    else:
+        print(f"🔄 Mise à jour en cours ({args.workers} workers)...")
     print()
-    
-    # Statistiques
-    success_count = 0
-    failed_count = 0
-    failed_repos = []
-    
-    # Mettre à jour chaque repository
-    for i, repo in enumerate(repos, 1):
-        print(f"[{i}/{len(repos)}] {repo['full_name']}")
-        
-        if update_workflow(repo['owner'], repo['name'], NEW_WORKFLOW_CONTENT):
-            success_count += 1
-        else:
-            failed_count += 1
-            failed_repos.append(repo['full_name'])
-        
-        # Pause pour éviter le rate limiting
-        time.sleep(0.5)
-        print()
-    
+
+    # Chaque résultat est journalisé dès qu'il est connu
+    run_id = journal.start_run(template_sha, args.dry_run) if journal else None
+    results: List[Dict] = []
+
+    def record(result: Dict):
+        results.append(result)
+        if journal:
+            journal.record(run_id, template_sha, result)
+
+    start = time.perf_counter()
+    status = "completed"
+    try:
+        rollout(client, repos, workflow_content, args.workers, args.dry_run, args.diff, on_result=record)
+    except DiscoveryError as e:
+        print(f"❌ Erreur récupération organisations: {e}")
+        status = "failed"
+    except KeyboardInterrupt:
+        status = "interrupted"
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - start
+
+    stats = run_stats(results, len(skipped), elapsed, client)
+    if journal:
+        journal.finish_run(run_id, status, stats)
+        journal.close()
+
+    if status == "failed":
+        sys.exit(1)
+
+    if not results:
+        print(f"✅ Tous les repositories sont déjà à jour ({len(skipped)} ignorés)" if skipped
+              else "⚠️  Aucun repository trouvé")
+        sys.exit(1 if discovery_errors else 0)
+
+    failed_repos = sorted(r["full_name"] for r in results if r["status"] == "failed")
+
     # Résumé
     print()
     print("=" * 50)
-    print("📊 Résumé de la mise à jour")
+    print("📊 Résumé de la simulation" if args.dry_run else "📊 Résumé de la mise à jour")
     print("=" * 50)
-    print(f"✅ Succès: {success_count}/{len(repos)}")
-    print(f"❌ Échecs: {failed_count}/{len(repos)}")
-    
+    print(f"↻ {'À modifier' if args.dry_run else 'Modifiés'}: {stats['changed']}/{len(results)}")
+    print(f"= Identiques (ignorés): {stats['unchanged']}/{len(results)}")
+    print(f"❌ Échecs: {stats['failed']}/{len(results)}")
+    if skipped:
+        print(f"⏭️  Déjà à jour d'après le journal: {len(skipped)}")
+    print(f"⏱️  Durée: {elapsed:.1f}s ({stats['repos_per_s']:.1f} repos/s, "
+          f"{client.requests_sent} requêtes dont {client.retried} retentées, débit final {bucket.rate:.1f} req/s)")
+    print(f"⏱️  Latence par repository: p50 {stats['p50_ms']:.0f}ms, p95 {stats['p95_ms']:.0f}ms, "
+          f"max {stats['max_ms']:.0f}ms")
+    if inventory.not_modified:
+        print(f"📦 Pages de listage inchangées (304): {inventory.not_modified}")
+
+    if discovery_errors:
+        print()
+        print("⚠️  Organisations non scannées (inventaire non enregistré):")
+        for error in discovery_errors:
+            print(f"  - {error}")
+
     if failed_repos:
         print()
         print("❌ Repositories en échec:")
         for repo in failed_repos:
             print(f"  - {repo}")
-    
+        if journal and not args.dry_run:
+            print(f"🔁 Relancer uniquement les échecs: {sys.argv[0]} --retry-failed")
+
     print()
+    if status == "interrupted":
+        print(f"⏹️  Exécution interrompue (run {run_id}); reprendre avec --resume" if journal
+              else "⏹️  Exécution interrompue")
+        print()
+        sys.exit(130)
+
+    if args.dry_run:
+        print("✅ Simulation terminée, aucun repository modifié")
+        print()
+        return
+
     print("✅ Mise à jour terminée !")
     print()
-    
+
     # Prochaines étapes
     print("📋 Prochaines étapes:")
     print("1. Vérifier manuellement quelques repositories")
@@ -268,4 +918,4 @@ def main():
     print()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,48 +3,75 @@ Wiki - Documentation pour les étudiants
 Technologies de Containérisation
 """
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from starlette.middleware.base import BaseHTTPMiddleware
-import markdown
-import frontmatter
+from starlette.middleware.gzip import GZipMiddleware
 from pathlib import Path
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from rendering import render_markdown_file
+from page_index import PageIndex
+from search_index import SearchIndex
+from http_cache import PageResponseCache, is_not_modified
+from middleware import SecurityHeadersMiddleware
+from static_export import StaticExportMiddleware
+from startup import FirstRequestTimer, StartupMetrics, create_templates, precompile_templates
+from content_watcher import ContentWatcher
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+import hashlib
+import math
 import os
 import json
+import asyncio
 from urllib.parse import urlparse
 
-app = FastAPI(title="Wiki - Containérisation")
-
-# Security Headers Middleware
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-
-        # Content Security Policy
-        csp = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com; "
-            "style-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com; "
-            "font-src 'self' https://cdnjs.cloudflare.com; "
-            "img-src 'self' data:; "
-            "connect-src 'self';"
-        )
-        response.headers["Content-Security-Policy"] = csp
-
-        return response
-
-# Add middleware
-app.add_middleware(SecurityHeadersMiddleware)
+# Démarrage à froid mesuré depuis le chargement du module (voir startup.py)
+startup_metrics = StartupMetrics()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Gestion du cycle de vie de l'application"""
+    global render_pool, content_watcher
+    startup_metrics.templates = precompile_templates(templates)
+    render_pool = create_render_pool()
+    count = await warm_page_cache()
+    print(f"📚 {count} pages pré-rendues")
+    precompute_hreflang_links()
+    for lang in SUPPORTED_LANGUAGES:
+        get_all_pages(lang)
+        index = get_search_index(lang)
+        if index is not None:
+            index.refresh(force=True)
+
+    watcher_task = None
+    if WATCH_CONTENT and CONTENT_DIR.exists():
+        # Le watcher remplace les vérifications de dates faites par les index
+        set_index_check_interval(math.inf)
+        content_watcher = ContentWatcher(CONTENT_DIR, reload_content, poll_interval=CONTENT_POLL_INTERVAL)
+        watcher_task = asyncio.create_task(content_watcher.run())
+
+    startup_metrics.mark_ready()
+    print(f"⏱️  Prêt en {startup_metrics.ready_ms:.0f} ms")
+    yield
+
+    if watcher_task is not None:
+        # awatch s'arrête de lui-même sur stop(); l'annuler interromprait son thread
+        content_watcher.stop()
+        try:
+            await asyncio.wait_for(watcher_task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        content_watcher = None
+        set_index_check_interval(PAGE_INDEX_CHECK_INTERVAL)
+    if render_pool is not None:
+        render_pool.shutdown(wait=False, cancel_futures=True)
+        render_pool = None
+
+app = FastAPI(title="Wiki - Containérisation", lifespan=lifespan)
 
 # Configuration
 CONTENT_DIR = Path("content")
@@ -52,32 +79,100 @@ STATIC_DIR = Path("static")
 DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "en")
 SUPPORTED_LANGUAGES = ["en", "fr"]
 DOMAIN = os.getenv("WIKI_DOMAIN", "zohrabi.cloud")
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "256"))
+RENDER_POOL = os.getenv("RENDER_POOL", "process")  # "process" ou "thread"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGE_INDEX_CHECK_INTERVAL = float(os.getenv("PAGE_INDEX_CHECK_INTERVAL", "2"))
+SEARCH_RESULTS_MAX = int(os.getenv("SEARCH_RESULTS_MAX", "50"))
+WATCH_CONTENT = os.getenv("WATCH_CONTENT", "true").lower() in ("1", "true", "yes")
+CONTENT_POLL_INTERVAL = float(os.getenv("CONTENT_POLL_INTERVAL", "2"))
+ACCEPT_LANGUAGE_CACHE_SIZE = int(os.getenv("ACCEPT_LANGUAGE_CACHE_SIZE", "1024"))
+ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", ".jinja-cache")
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", str(ENVIRONMENT != "production")).lower() in ("1", "true", "yes")
+STATIC_EXPORT_DIR = os.getenv("STATIC_EXPORT_DIR", "")  # sortie de build_static.py
+
+# Middlewares ASGI purs (voir middleware.py): le dernier ajouté est le plus externe.
+# Les pages HTML mises en cache arrivent déjà compressées (http_cache.py);
+# GZipMiddleware ne traite que les autres réponses.
+if STATIC_EXPORT_DIR:
+    # Le plus interne: les fichiers de l'export sont compressés et reçoivent
+    # les en-têtes de sécurité (export_fingerprint est défini plus bas)
+    app.add_middleware(StaticExportMiddleware, directory=STATIC_EXPORT_DIR,
+                       fingerprint=lambda lang: export_fingerprint(lang))
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(FirstRequestTimer, metrics=startup_metrics)
 
 # Charger les traductions
 with open("translations.json", "r", encoding="utf-8") as f:
     TRANSLATIONS = json.load(f)
 
-# Templates
-templates = Jinja2Templates(directory="templates")
+def flatten_translations(tree: dict, prefix: str = "") -> Dict[str, object]:
+    """Aplatit l'arbre de traductions en clés pointées ("home.title")"""
+    flat = {}
+    for key, value in tree.items():
+        flat[prefix + key] = value
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f"{prefix}{key}."))
+    return flat
+
+class TranslationTable(dict):
+    """Traductions d'une langue en clés pointées; une clé inconnue se traduit par elle-même"""
+
+    def __missing__(self, key: str):
+        return key
+
+# Traductions précompilées: une table par langue, complétée par l'anglais
+FLAT_TRANSLATIONS = {
+    lang: TranslationTable({**flatten_translations(TRANSLATIONS["en"]), **flatten_translations(tree)})
+    for lang, tree in TRANSLATIONS.items()
+}
+
+def get_translator(lang: str):
+    """
+    Fonction t('clé') des templates pour une langue (langue → anglais → clé)
+
+    Liée une fois par rendu et passée dans le contexte: chaque appel est un
+    accès direct à la table, sans relire `lang` dans le contexte Jinja.
+    """
+    return FLAT_TRANSLATIONS.get(lang, FLAT_TRANSLATIONS["en"]).__getitem__
+
+def get_translation(lang: str, key: str):
+    """Récupère une traduction (langue demandée → anglais → clé)"""
+    return get_translator(lang)(key)
+
+# Templates: précompilés au démarrage, bytecode en cache sur disque,
+# sans vérification des fichiers source en production
+templates = create_templates("templates", JINJA_CACHE_DIR, TEMPLATES_AUTO_RELOAD)
 
 # Monter les fichiers statiques
 if STATIC_DIR.exists():
     app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
-# Configuration Markdown avec extensions
-md = markdown.Markdown(extensions=[
-    'fenced_code',
-    'codehilite',
-    'tables',
-    'toc',
-    'attr_list',
-    'admonition'
-])
-
-def parse_accept_language(header: str) -> List[str]:
-    """Parse Accept-Language header and return ordered list of language codes"""
+# Cache des pages rendues: {(chemin, mtime_ns): page}, éviction LRU
+page_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+
+# Pool de rendu Markdown (créé dans lifespan; rendu direct si None)
+render_pool: Optional[Executor] = None
+
+def create_render_pool() -> Optional[Executor]:
+    """Pool de workers pour la conversion Markdown (CPU), hors boucle d'événements"""
+    if RENDER_WORKERS <= 0:
+        return None
+    if RENDER_POOL == "thread":
+        return ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+    return ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+
+@lru_cache(maxsize=ACCEPT_LANGUAGE_CACHE_SIZE)
+def parse_accept_language(header: str) -> Tuple[str, ...]:
+    """
+    Parse Accept-Language header and return ordered language codes.
+
+    Memoized (LRU): the same few browser headers come back on most requests.
+    """
     if not header:
-        return []
+        return ()
 
     languages = []
     for lang in header.split(','):
@@ -95,7 +190,15 @@ def parse_accept_language(header: str) -> List[str]:
     languages.sort(key=lambda x: x[1], reverse=True)
 
     # Extract language codes and normalize (en-US -> en)
-    return [lang[0].split('-')[0] for lang in languages]
+    return tuple(lang[0].split('-')[0] for lang in languages)
+
+@lru_cache(maxsize=ACCEPT_LANGUAGE_CACHE_SIZE)
+def accept_language_preference(header: str) -> Optional[str]:
+    """First supported language of an Accept-Language header (memoized)"""
+    for lang in parse_accept_language(header):
+        if lang in SUPPORTED_LANGUAGES:
+            return lang
+    return None
 
 def detect_language(request: Request, url_lang: Optional[str] = None) -> str:
     """
@@ -115,17 +218,15 @@ def detect_language(request: Request, url_lang: Optional[str] = None) -> str:
         return cookie_lang
 
     # Priority 3: Accept-Language header
-    accept_language = request.headers.get("accept-language", "")
-    accepted_langs = parse_accept_language(accept_language)
-    for lang in accepted_langs:
-        if lang in SUPPORTED_LANGUAGES:
-            return lang
+    header_lang = accept_language_preference(request.headers.get("accept-language", ""))
+    if header_lang is not None:
+        return header_lang
 
     # Priority 4: Default
     return DEFAULT_LANGUAGE
 
-def generate_hreflang_links(request: Request, page_path: str = "") -> List[Dict[str, str]]:
-    """Generate hreflang links for SEO"""
+def build_hreflang_links(page_path: str) -> List[Dict[str, str]]:
+    """Hreflang links for one page path (one per language + x-default)"""
     hreflang_links = []
 
     for lang in SUPPORTED_LANGUAGES:
@@ -144,16 +245,56 @@ def generate_hreflang_links(request: Request, page_path: str = "") -> List[Dict[
 
     return hreflang_links
 
-def get_translation(lang: str, key: str):
-    """Récupère une traduction"""
-    keys = key.split(".")
-    value = TRANSLATIONS.get(lang, TRANSLATIONS["en"])
-    for k in keys:
-        value = value.get(k, key)
-    return value
-
-def get_page_content(page_name: str, lang: str = "en") -> Dict:
-    """Charge le contenu d'une page markdown pour une langue donnée"""
+# Hreflang links per page path, precomputed at startup (see precompute_hreflang_links)
+hreflang_cache: Dict[str, List[Dict[str, str]]] = {}
+
+def precompute_hreflang_links() -> int:
+    """Builds hreflang links for the home page and every known page"""
+    paths = {""}
+    for lang in SUPPORTED_LANGUAGES:
+        lang_dir = CONTENT_DIR / lang
+        if lang_dir.exists():
+            paths.update(f"page/{md_file.stem}" for md_file in lang_dir.glob("*.md"))
+    for page_path in paths:
+        hreflang_cache[page_path] = build_hreflang_links(page_path)
+    return len(paths)
+
+def generate_hreflang_links(request: Request, page_path: str = "") -> List[Dict[str, str]]:
+    """Generate hreflang links for SEO (shared list: do not modify)"""
+    links = hreflang_cache.get(page_path)
+    if links is None:
+        # Page added after startup
+        links = build_hreflang_links(page_path)
+        hreflang_cache[page_path] = links
+    return links
+
+
+async def render_page(page_path: Path, mtime_ns: int, page_name: str) -> Dict:
+    """
+    Rendu d'un fichier markdown, mis en cache (LRU).
+
+    La date de modification fait partie de la clé: un fichier modifié
+    produit une nouvelle entrée, l'ancienne finit évincée.
+    """
+    key = (str(page_path), mtime_ns)
+    page = page_cache.get(key)
+    if page is not None:
+        page_cache.move_to_end(key)
+        return page
+
+    if render_pool is None:
+        page = render_markdown_file(str(page_path), page_name)
+    else:
+        loop = asyncio.get_running_loop()
+        page = await loop.run_in_executor(render_pool, render_markdown_file, str(page_path), page_name)
+
+    page_cache[key] = page
+    while len(page_cache) > PAGE_CACHE_SIZE:
+        page_cache.popitem(last=False)
+    return page
+
+def resolve_page_path(page_name: str, lang: str) -> Optional[tuple]:
+    """(chemin, mtime_ns) du fichier markdown d'une page, None si introuvable"""
     # Essayer d'abord avec la langue demandée
     page_path = CONTENT_DIR / lang / f"{page_name}.md"
 
@@ -161,28 +302,41 @@ def get_page_content(page_name: str, lang: str = "en") -> Dict:
     if not page_path.exists():
         page_path = CONTENT_DIR / DEFAULT_LANGUAGE / f"{page_name}.md"
 
-    # Si toujours pas trouvé, retourner None
-    if not page_path.exists():
+    try:
+        return page_path, page_path.stat().st_mtime_ns
+    except FileNotFoundError:
         return None
 
-    # Lire le fichier avec frontmatter
-    post = frontmatter.load(page_path)
-
-    # Convertir markdown en HTML
-    html_content = md.convert(post.content)
-
-    return {
-        "title": post.get("title", page_name.title()),
-        "description": post.get("description", ""),
-        "content": html_content,
-        "metadata": post.metadata
-    }
+async def get_page_content(page_name: str, lang: str = "en") -> Dict:
+    """Charge le contenu d'une page markdown pour une langue donnée"""
+    resolved = resolve_page_path(page_name, lang)
 
-def get_all_pages(lang: str = "en") -> List[Dict]:
-    """Liste toutes les pages disponibles pour une langue donnée"""
-    pages = []
+    # Si toujours pas trouvé, retourner None
+    if resolved is None:
+        return None
 
-    # Chercher dans le répertoire de la langue
+    page_path, mtime_ns = resolved
+    return await render_page(page_path, mtime_ns, page_name)
+
+async def warm_page_cache() -> int:
+    """Pré-rend toutes les pages au démarrage (en parallèle sur le pool)"""
+    tasks = [
+        get_page_content(md_file.stem, lang)
+        for lang in SUPPORTED_LANGUAGES
+        for md_file in sorted((CONTENT_DIR / lang).glob("*.md"))
+    ]
+    await asyncio.gather(*tasks)
+    return len(tasks)
+
+def category_label(lang: str, category: str) -> str:
+    """Nom de catégorie traduit (nom d'origine si pas de traduction)"""
+    translated = get_translation(lang, f"categories.{category}")
+    if translated == f"categories.{category}":
+        return category
+    return translated
+
+def get_lang_dir(lang: str) -> Optional[Path]:
+    """Répertoire de contenu d'une langue (langue par défaut en fallback)"""
     lang_dir = CONTENT_DIR / lang
 
     if not lang_dir.exists():
@@ -190,22 +344,175 @@ def get_all_pages(lang: str = "en") -> List[Dict]:
         lang_dir = CONTENT_DIR / DEFAULT_LANGUAGE
 
     if not lang_dir.exists():
-        return pages
-
-    for md_file in lang_dir.glob("*.md"):
-        post = frontmatter.load(md_file)
-        pages.append({
-            "slug": md_file.stem,
-            "title": post.get("title", md_file.stem.title()),
-            "description": post.get("description", ""),
-            "order": post.get("order", 999),
-            "category": post.get("category", "Général")
-        })
+        return None
+    return lang_dir
+
+# Intervalle de vérification des fichiers par les index (infini quand le
+# watcher de contenu tourne: c'est lui qui déclenche les rafraîchissements)
+index_check_interval = PAGE_INDEX_CHECK_INTERVAL
+
+def set_index_check_interval(interval: float):
+    global index_check_interval
+    index_check_interval = interval
+    for index in [*page_indexes.values(), *search_indexes.values()]:
+        index.check_interval = interval
 
-    # Trier par ordre
-    pages.sort(key=lambda x: x["order"])
+# Index des pages par (langue, répertoire): voir page_index.py
+page_indexes: Dict[tuple, PageIndex] = {}
+
+def get_page_index(lang: str) -> Optional[PageIndex]:
+    """Index des pages d'une langue"""
+    lang_dir = get_lang_dir(lang)
+    if lang_dir is None:
+        return None
+
+    key = (lang, str(lang_dir))
+    index = page_indexes.get(key)
+    if index is None:
+        index = PageIndex(
+            lang_dir,
+            lambda category: category_label(lang, category),
+            check_interval=index_check_interval
+        )
+        page_indexes[key] = index
+    return index
+
+# Index de recherche par répertoire: voir search_index.py
+search_indexes: Dict[str, SearchIndex] = {}
+
+def get_search_index(lang: str) -> Optional[SearchIndex]:
+    """Index de recherche plein texte d'une langue"""
+    lang_dir = get_lang_dir(lang)
+    if lang_dir is None:
+        return None
+
+    index = search_indexes.get(str(lang_dir))
+    if index is None:
+        index = SearchIndex(lang_dir, check_interval=index_check_interval)
+        search_indexes[str(lang_dir)] = index
+    return index
+
+def get_all_pages(lang: str = "en") -> List[Dict]:
+    """Liste toutes les pages disponibles pour une langue donnée"""
+    index = get_page_index(lang)
+    if index is None:
+        return []
+    return index.pages()
 
-    return pages
+def home_context(lang: str) -> Dict:
+    """Contexte du template home.html (route dynamique et build statique)"""
+    # Pages groupées par catégorie traduite (calculé une fois par version de l'index)
+    index = get_page_index(lang)
+    categories = index.categories() if index is not None else {}
+
+    return {
+        "categories": categories,
+        "lang": lang,
+        "t": get_translator(lang),
+        "hreflang_links": generate_hreflang_links(None, ""),
+        "current_url": f"https://{DOMAIN}/{lang}/"
+    }
+
+def page_context(lang: str, page_name: str, content: Dict) -> Dict:
+    """Contexte du template page.html (route dynamique et build statique)"""
+    return {
+        "title": content["title"],
+        "description": content["description"],
+        "content": content["content"],
+        # Liste des pages pour la navigation
+        "all_pages": get_all_pages(lang),
+        "lang": lang,
+        "t": get_translator(lang),
+        "hreflang_links": generate_hreflang_links(None, f"page/{page_name}"),
+        "current_url": f"https://{DOMAIN}/{lang}/page/{page_name}",
+        "page_name": page_name
+    }
+
+def not_found_context(lang: str) -> Dict:
+    """Contexte du template 404.html"""
+    return {
+        "title": "Page non trouvée",
+        "lang": lang,
+        "t": get_translator(lang)
+    }
+
+# Pages HTML rendues (et compressées), validées par ETag
+page_responses = PageResponseCache(PAGE_CACHE_SIZE)
+
+def assets_mtime_ns() -> int:
+    """Date de modification la plus récente des templates et des traductions"""
+    paths = [Path("translations.json"), *Path("templates").glob("*.html")]
+    return max((path.stat().st_mtime_ns for path in paths if path.exists()), default=0)
+
+def assets_fingerprint() -> str:
+    """Empreinte du contenu des templates et des traductions"""
+    digest = hashlib.sha1()
+    for path in [Path("translations.json"), *sorted(Path("templates").glob("*.html"))]:
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+# Templates et traductions sont chargés au démarrage
+ASSETS_MTIME_NS = assets_mtime_ns()
+ASSETS_FINGERPRINT = assets_fingerprint()
+
+def export_fingerprint(lang: str) -> Optional[str]:
+    """
+    Empreinte du HTML d'une langue: pages (noms et dates), templates,
+    traductions et domaine (URLs canoniques et hreflang). Écrite dans le
+    manifeste de l'export statique et comparée avant de le servir.
+    """
+    index = get_page_index(lang)
+    if index is None:
+        return None
+    stamp = f"{index.fingerprint()}:{ASSETS_FINGERPRINT}:{DOMAIN}"
+    return hashlib.sha1(stamp.encode("utf-8")).hexdigest()
+
+# Surveillance du contenu (créée dans lifespan) et état du rechargement à chaud
+content_watcher: Optional[ContentWatcher] = None
+content_status = {"last_reload": None, "reloads": 0, "changed_files": 0}
+
+async def reload_content(paths: Set[Path]):
+    """
+    Callback du watcher: pages ajoutées, modifiées ou supprimées.
+
+    Les pages modifiées sont d'abord rendues (cache des pages), puis les
+    index de pages et de recherche des répertoires touchés sont rafraîchis
+    dans un même bloc sans await: une requête voit soit l'ancien état, soit
+    le nouveau, jamais un mélange des deux.
+    """
+    # Mêmes chemins que resolve_page_path (CONTENT_DIR/lang/page.md): ils
+    # forment la clé du cache des pages
+    content_root = CONTENT_DIR.resolve()
+    paths = {CONTENT_DIR / path.resolve().relative_to(content_root) for path in paths}
+
+    async def prerender(path: Path):
+        # Un fichier peut disparaître entre l'événement et le rendu
+        try:
+            await render_page(path, path.stat().st_mtime_ns, path.stem)
+        except FileNotFoundError:
+            pass
+
+    await asyncio.gather(*(prerender(path) for path in paths))
+
+    dirs = {path.parent.resolve() for path in paths}
+    for index in [*page_indexes.values(), *search_indexes.values()]:
+        if index.lang_dir.resolve() in dirs:
+            index.refresh(force=True)
+
+    # Les rendus des anciennes versions ne serviront plus
+    for key in [key for key in page_cache if Path(key[0]) in paths]:
+        try:
+            mtime_ns = Path(key[0]).stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns != key[1]:
+            del page_cache[key]
+
+    content_status["last_reload"] = datetime.now(timezone.utc).isoformat()
+    content_status["reloads"] += 1
+    content_status["changed_files"] = len(paths)
+    print(f"🔄 Contenu rechargé: {', '.join(sorted(path.name for path in paths))}")
 
 # Redirect root to default language
 @app.get("/", response_class=HTMLResponse)
@@ -223,38 +530,17 @@ async def home(request: Request, lang: str):
         lang = DEFAULT_LANGUAGE
         return RedirectResponse(url=f"/{lang}/", status_code=302)
 
-    pages = get_all_pages(lang)
+    index = get_page_index(lang)
+    stamp = f"{index.fingerprint() if index is not None else ''}:{ASSETS_MTIME_NS}"
 
-    # Grouper par catégorie et traduire les noms de catégories
-    categories = {}
-    for page in pages:
-        cat = page["category"]
-        # Traduire le nom de la catégorie
-        translated_cat = get_translation(lang, f"categories.{cat}")
-        if translated_cat == f"categories.{cat}":
-            translated_cat = cat
-
-        if translated_cat not in categories:
-            categories[translated_cat] = []
-        categories[translated_cat].append(page)
-
-    # Generate hreflang links
-    hreflang_links = generate_hreflang_links(request, "")
-
-    template_response = templates.TemplateResponse("home.html", {
-        "request": request,
-        "categories": categories,
-        "lang": lang,
-        "hreflang_links": hreflang_links,
-        "current_url": f"https://{DOMAIN}/{lang}/",
-        "t": lambda key: get_translation(lang, key)
-    })
+    async def render() -> bytes:
+        return templates.get_template("home.html").render(home_context(lang)).encode("utf-8")
 
     # Set HTTP headers (best practice)
-    template_response.headers["Content-Language"] = lang
-    template_response.headers["Vary"] = "Accept-Language, Cookie"
-
-    return template_response
+    return await page_responses.respond(request, f"/{lang}/", stamp, render, {
+        "Content-Language": lang,
+        "Vary": "Accept-Language, Cookie"
+    })
 
 # Language-prefixed page route
 @app.get("/{lang}/page/{page_name}", response_class=HTMLResponse)
@@ -265,39 +551,28 @@ async def show_page(request: Request, lang: str, page_name: str):
         lang = DEFAULT_LANGUAGE
         return RedirectResponse(url=f"/{lang}/page/{page_name}", status_code=302)
 
-    content = get_page_content(page_name, lang)
+    resolved = resolve_page_path(page_name, lang)
+    index = get_page_index(lang)
 
-    if not content:
+    if resolved is None or index is None:
         return templates.TemplateResponse("404.html", {
             "request": request,
-            "title": "Page non trouvée",
-            "lang": lang
+            **not_found_context(lang)
         }, status_code=404)
 
-    # Liste des pages pour la navigation
-    all_pages = get_all_pages(lang)
+    # La page dépend de son fichier et de la navigation (toutes les pages de la langue)
+    page_path, mtime_ns = resolved
+    stamp = f"{index.fingerprint()}:{page_path}:{mtime_ns}:{ASSETS_MTIME_NS}"
 
-    # Generate hreflang links
-    hreflang_links = generate_hreflang_links(request, f"page/{page_name}")
-
-    template_response = templates.TemplateResponse("page.html", {
-        "request": request,
-        "title": content["title"],
-        "description": content["description"],
-        "content": content["content"],
-        "all_pages": all_pages,
-        "lang": lang,
-        "hreflang_links": hreflang_links,
-        "current_url": f"https://{DOMAIN}/{lang}/page/{page_name}",
-        "page_name": page_name,
-        "t": lambda key: get_translation(lang, key)
-    })
+    async def render() -> bytes:
+        content = await render_page(page_path, mtime_ns, page_name)
+        return templates.get_template("page.html").render(page_context(lang, page_name, content)).encode("utf-8")
 
     # Set HTTP headers (best practice)
-    template_response.headers["Content-Language"] = lang
-    template_response.headers["Vary"] = "Accept-Language, Cookie"
-
-    return template_response
+    return await page_responses.respond(request, f"/{lang}/page/{page_name}", stamp, render, {
+        "Content-Language": lang,
+        "Vary": "Accept-Language, Cookie"
+    })
 
 # Backward compatibility: redirect old URLs without language prefix
 @app.get("/page/{page_name}", response_class=HTMLResponse)
@@ -347,7 +622,7 @@ async def set_language(request: Request, language: str):
         value=language,
         max_age=31536000,  # 1 year
         httponly=True,
-        secure=os.getenv("ENVIRONMENT", "production") == "production",
+        secure=ENVIRONMENT == "production",
         samesite="lax"
     )
     return response
@@ -355,7 +630,12 @@ async def set_language(request: Request, language: str):
 @app.get("/health")
 async def health():
     """Healthcheck"""
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "page_responses": page_responses.stats(),
+        "content": {"watcher": content_watcher.mode if content_watcher else None, **content_status},
+        "startup": startup_metrics.as_dict()
+    }
 
 # Language-prefixed search
 @app.get("/{lang}/search", response_class=HTMLResponse)
@@ -367,26 +647,8 @@ async def search(request: Request, lang: str, q: str = ""):
     if not q:
         return RedirectResponse(f"/{lang}/")
 
-    results = []
-    query = q.lower()
-
-    # Chercher dans le répertoire de la langue
-    lang_dir = CONTENT_DIR / lang
-    if not lang_dir.exists():
-        lang_dir = CONTENT_DIR / DEFAULT_LANGUAGE
-
-    for md_file in lang_dir.glob("*.md"):
-        post = frontmatter.load(md_file)
-        content = post.content.lower()
-        title = post.get("title", "").lower()
-
-        if query in title or query in content:
-            results.append({
-                "slug": md_file.stem,
-                "title": post.get("title", md_file.stem.title()),
-                "description": post.get("description", ""),
-                "snippet": content[:200] + "..."
-            })
+    index = get_search_index(lang)
+    results = index.search(q, limit=SEARCH_RESULTS_MAX) if index is not None else []
 
     template_response = templates.TemplateResponse("search.html", {
         "request": request,
@@ -394,7 +656,7 @@ async def search(request: Request, lang: str, q: str = ""):
         "results": results,
         "title": f"Recherche: {q}",
         "lang": lang,
-        "t": lambda key: get_translation(lang, key)
+        "t": get_translator(lang)
     })
 
     # Set HTTP headers (best practice)
@@ -403,6 +665,39 @@ async def search(request: Request, lang: str, q: str = ""):
 
     return template_response
 
+@app.get("/api/{lang}/search")
+async def search_api(lang: str, q: str = "", limit: int = Query(10, ge=1, le=50)):
+    """Recherche au fil de la frappe (JSON)"""
+    if lang not in SUPPORTED_LANGUAGES:
+        lang = DEFAULT_LANGUAGE
+
+    index = get_search_index(lang)
+    results = index.search(q, limit=limit) if index is not None and q else []
+    return {"query": q, "lang": lang, "results": results}
+
+# Index de recherche sérialisé par langue: {lang: (version de l'index, corps, ETag)}
+search_index_exports: Dict[str, tuple] = {}
+
+@app.get("/{lang}/search-index.json")
+async def search_index_json(request: Request, lang: str):
+    """Index de recherche pour la recherche côté client (static/js/search.js)"""
+    index = get_search_index(lang) if lang in SUPPORTED_LANGUAGES else None
+    if index is None:
+        raise HTTPException(status_code=404)
+
+    index.refresh()
+    cached = search_index_exports.get(lang)
+    if cached is None or cached[0] != index.version:
+        body = json.dumps(index.export(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cached = (index.version, body, f'"{hashlib.sha1(body).hexdigest()[:32]}"')
+        search_index_exports[lang] = cached
+
+    _, body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Content-Language": lang}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 # Backward compatibility for old search
 @app.get("/search")
 async def redirect_old_search(request: Request, q: str = ""):
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: négociation de langue des routes de redirection
+(/, /page/{slug}, /search, /set-language/{lang}).
+
+1. detect_language() avec l'ancien parse_accept_language (découpage et tri
+   à chaque appel) et avec la version mémoïsée;
+2. requêtes/seconde des routes de redirection, en mémoire (ASGI).
+
+Usage (depuis wiki/):
+    python benchmarks/bench_language.py --iterations 50000 --requests 3000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+# En-têtes Accept-Language courants (quelques navigateurs reviennent sans cesse)
+HEADERS = [
+    "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+    "en-US,en;q=0.9",
+    "fr-FR,fr;q=0.9",
+    "en-GB,en;q=0.9,fr;q=0.8",
+    "fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3",
+    "de-DE,de;q=0.9,en;q=0.8",
+    "en",
+    "",
+]
+
+
+def legacy_parse_accept_language(header: str) -> list:
+    """Implémentation d'origine, sans cache"""
+    if not header:
+        return []
+    languages = []
+    for lang in header.split(','):
+        parts = lang.strip().split(';')
+        code = parts[0].strip()
+        quality = 1.0
+        if len(parts) > 1 and parts[1].startswith('q='):
+            try:
+                quality = float(parts[1][2:])
+            except ValueError:
+                quality = 1.0
+        languages.append((code, quality))
+    languages.sort(key=lambda x: x[1], reverse=True)
+    return [lang[0].split('-')[0] for lang in languages]
+
+
+def legacy_detect(header: str) -> str:
+    for lang in legacy_parse_accept_language(header):
+        if lang in app.SUPPORTED_LANGUAGES:
+            return lang
+    return app.DEFAULT_LANGUAGE
+
+
+def cached_detect(header: str) -> str:
+    return app.accept_language_preference(header) or app.DEFAULT_LANGUAGE
+
+
+def bench_function(label: str, detect, headers: list) -> float:
+    start = time.perf_counter()
+    for header in headers:
+        detect(header)
+    per_call = (time.perf_counter() - start) / len(headers) * 1e9
+    print(f"{label:<28} {per_call:>9.0f} ns/appel")
+    return per_call
+
+
+async def bench_routes(total: int, concurrency: int, seed: int):
+    rng = random.Random(seed)
+    slugs = [page["slug"] for page in app.get_all_pages(app.DEFAULT_LANGUAGE)] or ["faq"]
+    routes = ["/", "/page/{slug}", "/search?q=docker", "/set-language/fr"]
+
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://wiki") as client:
+        for route in routes:
+            requests = [
+                (route.format(slug=rng.choice(slugs)), {"accept-language": rng.choice(HEADERS)})
+                for _ in range(total)
+            ]
+            counter = iter(requests)
+
+            async def worker():
+                for url, headers in counter:
+                    response = await client.get(url, headers=headers, follow_redirects=False)
+                    assert response.status_code in (301, 302), (url, response.status_code)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            rps = total / (time.perf_counter() - start)
+            print(f"{route:<28} {rps:>9.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la négociation de langue")
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    headers = [rng.choice(HEADERS) for _ in range(args.iterations)]
+
+    print("detect_language (en-tête Accept-Language)")
+    legacy = bench_function("parse à chaque appel", legacy_detect, headers)
+    current = bench_function("LRU mémoïsé", cached_detect, headers)
+    print(f"Gain: x{legacy / current:.1f}")
+    print(app.accept_language_preference.cache_info())
+
+    print("\nRoutes de redirection")
+    asyncio.run(bench_routes(args.requests, args.concurrency, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requêtes/seconde du wiki dynamique (avec son cache de réponses),
+de l'export statique (build_static.py) servi par l'application
+(STATIC_EXPORT_DIR, static_export.py) et du même export servi par un simple
+StaticFiles.
+
+Les requêtes passent par l'interface ASGI en mémoire (httpx.ASGITransport):
+on mesure le coût de l'application, sans réseau.
+
+Usage (depuis wiki/):
+    python benchmarks/bench_static.py --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from starlette.staticfiles import StaticFiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import build_static  # noqa: E402
+from static_export import StaticExportMiddleware  # noqa: E402
+
+
+def route_paths() -> list:
+    paths = []
+    for lang in app.SUPPORTED_LANGUAGES:
+        paths.append(f"/{lang}/")
+        paths.extend(f"/{lang}/page/{page['slug']}" for page in app.get_all_pages(lang))
+    return paths
+
+
+def static_path(path: str) -> str:
+    """URL de route → URL de l'export (un index.html par répertoire)"""
+    return path if path.endswith("/") else path + "/"
+
+
+async def run(label: str, asgi_app, paths: list, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://wiki") as client:
+        for path in paths:
+            response = await client.get(path)
+            assert response.status_code == 200, (label, path, response.status_code)
+
+        counter = iter(range(total))
+
+        async def worker():
+            for i in counter:
+                await client.get(paths[i % len(paths)])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    rps = total / elapsed
+    print(f"{label:<32} {rps:>9.0f} req/s")
+    return rps
+
+
+async def main_async(args):
+    # Rendu direct (sans pool de processus); le cache est chauffé avant mesure
+    app.render_pool = None
+    await app.warm_page_cache()
+    paths = route_paths()
+
+    with tempfile.TemporaryDirectory() as output:
+        await build_static.build(Path(output))
+
+        dynamic = await run("dynamique (FastAPI + cache)", app.app, paths, args.requests, args.concurrency)
+
+        # Routes d'origine: l'export est servi devant l'application, qui reste le repli
+        served = StaticExportMiddleware(app.app, output, app.export_fingerprint)
+        exported = await run("export servi par l'app", served, paths, args.requests, args.concurrency)
+
+        files = StaticFiles(directory=output, html=True)
+        static = await run(
+            "StaticFiles seul", files, [static_path(p) for p in paths], args.requests, args.concurrency
+        )
+
+    print(f"export servi par l'app / dynamique: x{exported / dynamic:.1f}")
+    print(f"StaticFiles / dynamique: x{static / dynamic:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wiki dynamique vs export statique")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
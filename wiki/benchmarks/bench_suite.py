@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks du wiki
+
+Génère un contenu synthétique (synthetic_content.py), démarre l'application
+en mémoire (lifespan compris) et mesure, pour chaque scénario, les
+percentiles de latence et les requêtes/seconde via httpx.ASGITransport:
+
+    home        /{lang}/
+    page        /{lang}/page/{slug}
+    search      /{lang}/search?q=...
+    search_api  /api/{lang}/search?q=<préfixe>   (recherche au fil de la frappe)
+
+Avec --baseline, les résultats sont comparés à une exécution de référence
+et le script sort en erreur (code 1) si un scénario régresse au-delà de
+--tolerance (p95 plus lent ou débit plus faible).
+
+Usage (depuis wiki/):
+    python benchmarks/bench_suite.py --pages 200 --requests 2000 --output results.json
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --tolerance 0.15
+
+La référence dépend de la machine: l'enregistrer sur celle qui exécute
+la comparaison.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+import synthetic_content  # noqa: E402
+from stats import summarize  # noqa: E402
+
+SCENARIOS = ["home", "page", "search", "search_api"]
+
+
+def url_factory(scenario: str, slugs: Dict[str, List[str]], rng: random.Random) -> Callable[[], str]:
+    """Générateur d'URL aléatoires (mais reproductibles) pour un scénario"""
+    langs = list(slugs)
+
+    def home():
+        return f"/{rng.choice(langs)}/"
+
+    def page():
+        lang = rng.choice(langs)
+        return f"/{lang}/page/{rng.choice(slugs[lang])}"
+
+    def search():
+        lang = rng.choice(langs)
+        words = rng.sample(synthetic_content.WORDS[lang], rng.randint(1, 2))
+        return f"/{lang}/search?q={' '.join(words)}"
+
+    def search_api():
+        lang = rng.choice(langs)
+        word = rng.choice(synthetic_content.WORDS[lang])
+        return f"/api/{lang}/search?q={word[:rng.randint(2, len(word))]}"
+
+    return {"home": home, "page": page, "search": search, "search_api": search_api}[scenario]
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, next_url: Callable[[], str],
+                       total: int, warmup: int, concurrency: int) -> Dict:
+    for _ in range(warmup):
+        await client.get(next_url())
+
+    urls = [next_url() for _ in range(total)]
+    queue = iter(urls)
+    latencies: List[float] = []
+    errors = [0]
+
+    async def worker():
+        for url in queue:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[0] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, errors[0], time.perf_counter() - start)
+
+
+async def run(args, content_dir: Path) -> List[Dict]:
+    slugs = synthetic_content.generate(content_dir, args.pages, args.seed)
+
+    # L'application lit CONTENT_DIR à chaque appel: on la pointe sur le contenu généré
+    app.CONTENT_DIR = content_dir
+    app.WATCH_CONTENT = False
+    if args.no_response_cache:
+        app.page_responses.max_entries = 0
+
+    results = []
+    async with app.app.router.lifespan_context(app.app):
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://wiki") as client:
+            for scenario in args.scenarios:
+                rng = random.Random(f"{args.seed}-{scenario}")
+                result = await run_scenario(
+                    client, scenario, url_factory(scenario, slugs, rng),
+                    args.requests, args.warmup, args.concurrency
+                )
+                results.append(result)
+                print_result(result)
+    return results
+
+
+def print_header():
+    print(f"{'Scénario':<12} {'Req':>6} {'Err':>5} {'RPS':>9} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+
+
+def print_result(r: Dict):
+    print(f"{r['name']:<12} {r['count']:>6} {r['errors']:>5} {r['rps']:>9.0f} "
+          f"{r['p50']:>7.2f}ms {r['p90']:>6.2f}ms {r['p95']:>6.2f}ms {r['p99']:>6.2f}ms {r['max']:>6.2f}ms")
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Régressions par rapport à la référence (liste vide si aucune)"""
+    reference = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        ref = reference.get(r["name"])
+        if ref is None:
+            continue
+        if r["p95"] > ref["p95"] * (1 + tolerance):
+            regressions.append(f"{r['name']}: p95 {r['p95']:.2f}ms > {ref['p95']:.2f}ms (+{tolerance:.0%})")
+        if r["rps"] < ref["rps"] * (1 - tolerance):
+            regressions.append(f"{r['name']}: {r['rps']:.0f} req/s < {ref['rps']:.0f} req/s (-{tolerance:.0%})")
+        if r["errors"] > ref.get("errors", 0):
+            regressions.append(f"{r['name']}: {r['errors']} erreurs (référence: {ref.get('errors', 0)})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks du wiki")
+    parser.add_argument("--pages", type=int, default=200, help="Pages synthétiques par langue")
+    parser.add_argument("--requests", type=int, default=2000, help="Requêtes mesurées par scénario")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--no-response-cache", action="store_true",
+                        help="Désactive le cache des pages HTML (mesure le rendu des templates)")
+    parser.add_argument("--output", help="Écrit les résultats en JSON")
+    parser.add_argument("--save-baseline", help="Enregistre les résultats comme référence")
+    parser.add_argument("--baseline", help="Compare à une référence et échoue en cas de régression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Écart toléré (défaut: 0.15)")
+    args = parser.parse_args()
+
+    print(f"🧪 {args.pages} pages × 2 langues, {args.requests} requêtes/scénario, concurrence {args.concurrency}")
+    print_header()
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(args, Path(tmp) / "content"))
+
+    report = {
+        "config": {
+            "pages": args.pages,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "no_response_cache": args.no_response_cache,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Résultats écrits dans {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("pages") != args.pages:
+            print("⚠️  La référence a été mesurée avec un autre nombre de pages")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Régressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("✅ Pas de régression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark des traductions dans les templates
+
+Compare trois fonctions t('clé'):
+- d'origine: lambda par requête, split + parcours du dict imbriqué;
+- global Jinja @pass_context relisant `lang` dans le contexte à chaque appel;
+- table précompilée liée une fois par rendu (app.get_translator).
+
+Mesure le coût d'un appel tel que Jinja le fait (context.call) sur les clés
+utilisées par les templates, puis le rendu complet de home.html et
+page.html. Chaque mesure est le minimum de --repeat séries, les variantes
+étant alternées: le bruit de la machine touche les trois de la même façon.
+
+Le grades-dashboard utilise la même implémentation (get_translator de
+main.py): ce benchmark vaut pour les deux applications.
+
+Usage (depuis wiki/):
+    python benchmarks/bench_translations.py --iterations 500 --repeat 15
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import re
+import sys
+import timeit
+
+from jinja2 import pass_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def legacy_get_translation(lang: str, key: str):
+    """Implémentation d'origine: split + parcours du dict imbriqué"""
+    keys = key.split(".")
+    value = app.TRANSLATIONS.get(lang, app.TRANSLATIONS["en"])
+    for k in keys:
+        value = value.get(k, key) if isinstance(value, dict) else key
+    return value
+
+
+@pass_context
+def context_translate(context, key: str):
+    """Global Jinja relisant la langue dans le contexte à chaque appel"""
+    return app.get_translation(context.get("lang", app.DEFAULT_LANGUAGE), key)
+
+
+def translators(lang: str) -> dict:
+    """Fonction t (construite à chaque rendu, comme dans les routes) par variante"""
+    return {
+        "lambda + parcours imbriqué": lambda: (lambda key: legacy_get_translation(lang, key)),
+        "global @pass_context": lambda: context_translate,
+        "table liée (get_translator)": lambda: app.get_translator(lang),
+    }
+
+
+def best_of(functions: dict, number: int, repeat: int) -> dict:
+    """Minimum par variante (µs par appel de fonction), séries alternées"""
+    best = {label: float("inf") for label in functions}
+    for _ in range(repeat):
+        for label, function in functions.items():
+            best[label] = min(best[label], timeit.timeit(function, number=number) / number * 1e6)
+    return best
+
+
+def report(title: str, results: dict, unit: str, scale: float = 1.0):
+    print(title)
+    reference = next(iter(results.values()))
+    for label, value in results.items():
+        gain = (1 - value / reference) * 100
+        print(f"  {label:<30} {value * scale:>9.1f} {unit}  (gain {gain:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des traductions dans les templates")
+    parser.add_argument("--iterations", type=int, default=500, help="Rendus par série")
+    parser.add_argument("--repeat", type=int, default=15, help="Séries par variante")
+    parser.add_argument("--lang", default="fr")
+    parser.add_argument("--page", default="getting-started")
+    args = parser.parse_args()
+
+    lang = args.lang
+    variants = translators(lang)
+
+    # Appels t('clé') seuls, par context.call comme dans le code compilé
+    keys = [
+        key
+        for path in sorted(Path("templates").glob("*.html"))
+        for key in re.findall(r"\bt\('([^']+)'\)", path.read_text(encoding="utf-8"))
+    ]
+    context = app.templates.env.from_string("").new_context({"lang": lang})
+
+    def calls(make_t):
+        def run():
+            t = make_t()
+            for key in keys:
+                context.call(t, key)
+        return run
+
+    results = best_of({label: calls(make_t) for label, make_t in variants.items()}, args.iterations, args.repeat)
+    report(f"t('clé') ({len(keys)} clés des templates)", results, "ns/appel", 1000 / len(keys))
+
+    # Rendus complets; chaque variante reçoit une copie du contexte avec son t
+    content = asyncio.run(app.get_page_content(args.page, lang))
+    pages = {
+        "home.html": app.home_context(lang),
+        "page.html": app.page_context(lang, args.page, content),
+    }
+    for name, page_context in pages.items():
+        template = app.templates.get_template(name)
+        page_context = {key: value for key, value in page_context.items() if key != "t"}
+
+        def render(make_t, template=template, page_context=page_context):
+            return lambda: template.render({**page_context, "t": make_t()})
+
+        renders = {label: render(make_t) for label, make_t in variants.items()}
+        for function in renders.values():
+            function()  # compilation du template hors mesure
+        report(f"Rendu de {name}", best_of(renders, args.iterations, args.repeat), "µs/rendu")
+
+
+if __name__ == "__main__":
+    main()
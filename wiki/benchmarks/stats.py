@@ -0,0 +1,31 @@
+"""
+Statistiques de latence partagées par les benchmarks du wiki
+
+Importé par les scripts de ce répertoire (qui l'ajoutent à sys.path).
+"""
+
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile (méthode du rang le plus proche)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Statistiques d'un scénario (latences en millisecondes)"""
+    return {
+        "name": name,
+        "count": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50) * 1000,
+        "p90": percentile(latencies, 90) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "max": max(latencies, default=0.0) * 1000,
+    }
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Générateur de contenu synthétique pour les benchmarks du wiki
+
+Écrit N pages markdown par langue (en, fr) avec frontmatter, titres,
+paragraphes, listes, tableaux, admonitions et blocs de code, de tailles
+variées. La génération est déterministe pour une graine donnée: deux
+exécutions produisent le même contenu, donc des mesures comparables.
+
+Usage (depuis wiki/):
+    python benchmarks/synthetic_content.py --output /tmp/wiki-content --pages 200
+"""
+
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import random
+
+WORDS = {
+    "en": (
+        "container image volume network registry build layer compose service port "
+        "deploy commit branch merge push pull repository workflow runner test grade "
+        "student assignment report docker nginx python node database cache proxy "
+        "health check environment variable secret certificate domain traefik gitea"
+    ).split(),
+    "fr": (
+        "conteneur image volume réseau registre construction couche service port "
+        "déploiement commit branche fusion dépôt élève évaluation correction rapport "
+        "étape sécurité fichier répertoire variable environnement certificat domaine "
+        "requête réponse système exécution paramètre configuration vérification"
+    ).split(),
+}
+
+CATEGORIES = {
+    "en": ["🚀 Getting Started", "📦 Git", "🐳 Docker", "❓ Help"],
+    "fr": ["🚀 Démarrage", "📦 Git", "🐳 Docker", "❓ Aide"],
+}
+
+CODE_SAMPLES = [
+    ("bash", ["git clone https://git.example.com/{w}/{w2}.git", "cd {w2}", "docker compose up -d --build"]),
+    ("dockerfile", ["FROM python:3.11-slim", "WORKDIR /app", "COPY . .", "RUN pip install -r requirements.txt",
+                    "CMD [\"python\", \"{w}.py\"]"]),
+    ("yaml", ["services:", "  {w}:", "    image: {w2}:latest", "    ports:", "      - \"8080:80\""]),
+    ("python", ["def {w}_{w2}(value):", "    \"\"\"{w} {w2}\"\"\"", "    return value * 2"]),
+]
+
+# Tailles de page: beaucoup de petites, quelques très grandes
+SIZES = [(3, 0.5), (8, 0.3), (20, 0.15), (60, 0.05)]
+
+
+def sentence(rng: random.Random, words: List[str], length: int) -> str:
+    text = " ".join(rng.choice(words) for _ in range(length))
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraph(rng: random.Random, words: List[str]) -> str:
+    return " ".join(sentence(rng, words, rng.randint(6, 18)) for _ in range(rng.randint(2, 6)))
+
+
+def section(rng: random.Random, words: List[str]) -> str:
+    title = sentence(rng, words, rng.randint(2, 5)).rstrip(".")
+    parts = [f"## {title}", paragraph(rng, words)]
+
+    kind = rng.random()
+    if kind < 0.35:
+        language, lines = rng.choice(CODE_SAMPLES)
+        code = "\n".join(line.format(w=rng.choice(words), w2=rng.choice(words)) for line in lines)
+        parts.append(f"```{language}\n{code}\n```")
+    elif kind < 0.55:
+        parts.append("\n".join(f"- {sentence(rng, words, rng.randint(3, 8))}" for _ in range(rng.randint(3, 7))))
+    elif kind < 0.7:
+        rows = ["| " + " | ".join(rng.choice(words) for _ in range(3)) + " |" for _ in range(rng.randint(2, 6))]
+        parts.append("| A | B | C |\n|---|---|---|\n" + "\n".join(rows))
+    elif kind < 0.8:
+        parts.append(f"!!! note\n    {sentence(rng, words, 10)}")
+
+    parts.append(paragraph(rng, words))
+    return "\n\n".join(parts)
+
+
+def page_markdown(rng: random.Random, lang: str, index: int) -> str:
+    words = WORDS[lang]
+    sections = rng.choices([size for size, _ in SIZES], weights=[weight for _, weight in SIZES])[0]
+    title = sentence(rng, words, rng.randint(2, 4)).rstrip(".")
+    frontmatter = (
+        "---\n"
+        f"title: \"{title} {index}\"\n"
+        f"description: \"{sentence(rng, words, 8)}\"\n"
+        f"order: {index}\n"
+        f"category: \"{rng.choice(CATEGORIES[lang])}\"\n"
+        "---\n\n"
+    )
+    body = [f"# {title} {index}", paragraph(rng, words)]
+    body.extend(section(rng, words) for _ in range(sections))
+    return frontmatter + "\n\n".join(body) + "\n"
+
+
+def generate(output: Path, pages: int, seed: int = 42) -> Dict[str, List[str]]:
+    """Écrit output/{en,fr}/page-NNNN.md; retourne les slugs par langue"""
+    slugs = {}
+    for lang in WORDS:
+        rng = random.Random(f"{seed}-{lang}")
+        lang_dir = output / lang
+        lang_dir.mkdir(parents=True, exist_ok=True)
+        slugs[lang] = []
+        for i in range(pages):
+            slug = f"page-{i:04d}"
+            (lang_dir / f"{slug}.md").write_text(page_markdown(rng, lang, i), encoding="utf-8")
+            slugs[lang].append(slug)
+    return slugs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère du contenu markdown synthétique pour le wiki")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--pages", type=int, default=200, help="Pages par langue")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    slugs = generate(Path(args.output), args.pages, args.seed)
+    total = sum(len(s) for s in slugs.values())
+    print(f"✅ {total} pages écrites dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
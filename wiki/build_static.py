@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Export statique du wiki
+
+Rend chaque route /{lang}/ et /{lang}/page/{slug} avec les templates et
+les contextes de app.py, et écrit dans le répertoire de sortie:
+
+    {lang}/index.html             page d'accueil
+    {lang}/page/{slug}/index.html pages
+    {lang}/search-index.json      index de recherche (SearchIndex.export)
+    static/                       copie de static/ (CSS, JS)
+    404.html
+    manifest.json                 empreinte de chaque langue
+
+Avec STATIC_EXPORT_DIR, l'application sert cette sortie par StaticFiles
+(static_export.py) et retombe sur le rendu dynamique pour toute langue dont
+le contenu a changé depuis le build. La sortie peut aussi être publiée sans
+Python par n'importe quel serveur de fichiers (StaticFiles(html=True),
+GitHub/Gitea Pages...): chaque page étant un index.html dans son propre
+répertoire, /{lang}/page/{slug} est servi sans règle de réécriture, et la
+recherche de l'accueil lit search-index.json (static/js/search.js).
+
+L'empreinte d'une langue (app.export_fingerprint) couvre son contenu, les
+templates, les traductions et le domaine; une langue dont l'empreinte n'a
+pas changé depuis le dernier build n'est pas re-rendue (sauf --clean).
+
+Usage (depuis wiki/):
+    python build_static.py --output dist
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+import argparse
+import asyncio
+import json
+import shutil
+import time
+
+import app
+
+
+def write_file(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def load_manifest(output: Path) -> dict:
+    try:
+        return json.loads((output / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+async def build_language(lang: str, output: Path, previous: dict) -> Optional[dict]:
+    """Rend les routes d'une langue; retourne son entrée du manifeste"""
+    page_index = app.get_page_index(lang)
+    if page_index is None:
+        return None
+    page_index.refresh(force=True)
+
+    fingerprint = app.export_fingerprint(lang)
+    slugs = [page["slug"] for page in page_index.pages()]
+    if previous.get("fingerprint") == fingerprint and (output / lang).is_dir():
+        return {"fingerprint": fingerprint, "pages": slugs, "skipped": True}
+
+    # Les pages supprimées depuis le dernier build disparaissent de la sortie
+    shutil.rmtree(output / lang, ignore_errors=True)
+
+    home = app.templates.get_template("home.html")
+    write_file(output / lang / "index.html", home.render(app.home_context(lang)))
+
+    page_template = app.templates.get_template("page.html")
+    contents = await asyncio.gather(*(app.get_page_content(slug, lang) for slug in slugs))
+    for slug, content in zip(slugs, contents):
+        write_file(
+            output / lang / "page" / slug / "index.html",
+            page_template.render(app.page_context(lang, slug, content))
+        )
+
+    search_index = app.get_search_index(lang)
+    write_file(
+        output / lang / "search-index.json",
+        json.dumps(search_index.export(), ensure_ascii=False, separators=(",", ":"))
+    )
+
+    return {"fingerprint": fingerprint, "pages": slugs}
+
+
+async def build(output: Path) -> dict:
+    previous = load_manifest(output).get("languages", {})
+
+    app.render_pool = app.create_render_pool()
+    try:
+        languages = {}
+        for lang in app.SUPPORTED_LANGUAGES:
+            entry = await build_language(lang, output, previous.get(lang, {}))
+            if entry is None:
+                continue
+            skipped = entry.pop("skipped", False)
+            languages[lang] = entry
+            status = "inchangée" if skipped else f"{len(entry['pages'])} pages"
+            print(f"  {lang}: {status}")
+    finally:
+        if app.render_pool is not None:
+            app.render_pool.shutdown()
+            app.render_pool = None
+
+    shutil.rmtree(output / "static", ignore_errors=True)
+    shutil.copytree(app.STATIC_DIR, output / "static")
+
+    not_found = app.templates.get_template("404.html")
+    write_file(output / "404.html", not_found.render(app.not_found_context(app.DEFAULT_LANGUAGE)))
+
+    manifest = {
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "domain": app.DOMAIN,
+        "languages": languages
+    }
+    write_file(output / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export statique du wiki")
+    parser.add_argument("--output", default="dist", help="Répertoire de sortie (défaut: dist)")
+    parser.add_argument("--clean", action="store_true", help="Vider le répertoire de sortie avant le build")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    if args.clean and output.exists():
+        shutil.rmtree(output)
+
+    start = time.perf_counter()
+    print(f"🏗️  Export statique du wiki dans {output}/")
+    asyncio.run(build(output))
+    print(f"✅ Terminé en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Surveillance du répertoire de contenu du wiki
+
+Détecte les fichiers markdown ajoutés, modifiés ou supprimés et appelle
+un callback avec l'ensemble des chemins concernés. Utilise inotify via
+watchfiles (installé avec uvicorn[standard]); à défaut, ou si inotify
+n'est pas disponible (montages réseau, Docker Desktop...), compare
+périodiquement les dates de modification.
+"""
+
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Set
+import asyncio
+
+try:
+    import watchfiles
+except ImportError:  # watchfiles est optionnel: scrutation périodique
+    watchfiles = None
+
+OnChange = Callable[[Set[Path]], Awaitable[None]]
+
+
+def snapshot(content_dir: Path) -> Dict[Path, int]:
+    """{chemin: mtime_ns} des fichiers markdown du répertoire"""
+    files = {}
+    for md_file in content_dir.rglob("*.md"):
+        try:
+            files[md_file] = md_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+    return files
+
+
+class ContentWatcher:
+    """Surveille content_dir et appelle on_change(chemins modifiés)"""
+
+    def __init__(self, content_dir: Path, on_change: OnChange, poll_interval: float = 2.0, use_inotify: bool = True):
+        self.content_dir = content_dir
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and watchfiles is not None
+        self.mode: Optional[str] = None
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self):
+        """Boucle de surveillance (tâche de fond, jusqu'à stop() ou annulation)"""
+        if self.use_inotify:
+            try:
+                await self._run_inotify()
+                return
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️  Surveillance inotify indisponible ({e}), passage en scrutation")
+        await self._run_polling()
+
+    async def _run_inotify(self):
+        self.mode = "inotify"
+        async for changes in watchfiles.awatch(
+            self.content_dir,
+            stop_event=self._stop,
+            watch_filter=lambda change, path: path.endswith(".md"),
+            recursive=True
+        ):
+            await self._notify({Path(path) for _, path in changes})
+
+    async def _run_polling(self):
+        self.mode = "polling"
+        previous = await asyncio.to_thread(snapshot, self.content_dir)
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            current = await asyncio.to_thread(snapshot, self.content_dir)
+            changed = {
+                path for path in previous.keys() | current.keys()
+                if previous.get(path) != current.get(path)
+            }
+            previous = current
+            if changed:
+                await self._notify(changed)
+
+    async def _notify(self, paths: Set[Path]):
+        try:
+            await self.on_change(paths)
+        except Exception as e:
+            # Une erreur de rechargement ne doit pas arrêter la surveillance
+            print(f"⚠️  Rechargement du contenu échoué: {e}")
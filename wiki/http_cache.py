@@ -0,0 +1,169 @@
+"""
+Cache HTTP des pages du wiki
+
+Chaque page HTML est identifiée par un "tampon" dérivé des dates de
+modification du contenu (empreinte de l'index, fichier de la page,
+templates). Le tampon donne l'ETag: une visite répétée reçoit un 304 sans
+rendu. Pas de Last-Modified: supprimer la page la plus récente ferait
+reculer la date, et If-Modified-Since répondrait 304 à tort.
+
+Le HTML rendu est gardé en mémoire avec ses variantes compressées (gzip,
+brotli si disponible), calculées une seule fois.
+"""
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import gzip
+import hashlib
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel: gzip seulement
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+# Par ordre de préférence quand le client accepte les deux
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """Meilleur encodage disponible accepté par le client (q=0 exclu)"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        parts = item.strip().split(";")
+        quality = 1.0
+        for param in parts[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[parts[0].strip()] = quality
+
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def make_etag(key: str, stamp: str) -> str:
+    """ETag faible: la même page est servie sous plusieurs encodages"""
+    digest = hashlib.sha1(f"{key}|{stamp}".encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match (comparaison faible)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in tags)
+
+
+class CachedPage:
+    """HTML rendu et ses variantes compressées (calculées à la demande)"""
+
+    __slots__ = ("stamp", "body", "variants")
+
+    def __init__(self, stamp: str, body: bytes):
+        self.stamp = stamp
+        self.body = body
+        self.variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Corps pour l'encodage demandé (non compressé si ce n'est pas plus petit)"""
+        if encoding is None:
+            return self.body, None
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding)
+            self.variants[encoding] = variant
+        if len(variant) >= len(self.body):
+            return self.body, None
+        return variant, encoding
+
+
+class PageResponseCache:
+    """Cache LRU des pages rendues, valide tant que leur tampon ne change pas"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: str, stamp: str) -> Optional[CachedPage]:
+        page = self._entries.get(key)
+        if page is None or page.stamp != stamp:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return page
+
+    def put(self, key: str, page: CachedPage):
+        self._entries[key] = page
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        stamp: str,
+        render: Callable[[], Awaitable[bytes]],
+        headers: Dict[str, str]
+    ) -> Response:
+        """
+        Réponse HTML avec ETag: 304 si le client est à jour,
+        sinon corps en cache (rendu via render() au premier accès).
+        """
+        etag = make_etag(key, stamp)
+        headers = {
+            **headers,
+            "ETag": etag,
+            "Cache-Control": "no-cache"
+        }
+        headers["Vary"] = ", ".join(filter(None, [headers.get("Vary"), "Accept-Encoding"]))
+
+        if is_not_modified(request, etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        page = self.get(key, stamp)
+        if page is None:
+            page = CachedPage(stamp, await render())
+            self.put(key, page)
+
+        body, encoding = page.encoded(accepted_encoding(request.headers.get("accept-encoding", "")))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="text/html; charset=utf-8", headers=headers)
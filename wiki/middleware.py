@@ -0,0 +1,53 @@
+"""
+Middlewares ASGI du wiki
+
+Écrits directement sur l'interface ASGI (pas de BaseHTTPMiddleware): les
+en-têtes sont ajoutés au message http.response.start, sans mettre la
+réponse en tampon ni créer de tâche supplémentaire par requête.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Content Security Policy
+CSP = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com; "
+    "style-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com; "
+    "font-src 'self' https://cdnjs.cloudflare.com; "
+    "img-src 'self' data:; "
+    "connect-src 'self';"
+)
+
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+    (b"content-security-policy", CSP.encode("latin-1")),
+]
+SECURITY_HEADER_NAMES = {name for name, _ in SECURITY_HEADERS}
+
+
+class SecurityHeadersMiddleware:
+    """Ajoute les en-têtes de sécurité à toutes les réponses HTTP"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in SECURITY_HEADER_NAMES
+                ]
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
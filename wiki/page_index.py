@@ -0,0 +1,108 @@
+"""
+Index des pages du wiki
+
+Une instance par langue garde les métadonnées frontmatter (titre,
+description, ordre, catégorie) de chaque fichier avec sa date de
+modification. Un rafraîchissement ne relit que les fichiers ajoutés ou
+modifiés, et le regroupement par catégorie n'est recalculé que si la liste
+a changé.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import time
+
+import frontmatter
+
+
+def read_page_meta(md_file: Path) -> Dict:
+    """Métadonnées d'une page, telles qu'affichées dans la navigation"""
+    post = frontmatter.load(md_file)
+    return {
+        "slug": md_file.stem,
+        "title": post.get("title", md_file.stem.title()),
+        "description": post.get("description", ""),
+        "order": post.get("order", 999),
+        "category": post.get("category", "Général")
+    }
+
+
+class PageIndex:
+    """Liste triée des pages d'un répertoire, rafraîchie fichier par fichier"""
+
+    def __init__(self, lang_dir: Path, label_category: Callable[[str], str], check_interval: float = 2.0):
+        self.lang_dir = lang_dir
+        self.label_category = label_category
+        self.check_interval = check_interval
+        self._entries: Dict[str, Tuple[int, Dict]] = {}
+        self._pages: List[Dict] = []
+        self._categories: Optional[Dict[str, List[Dict]]] = None
+        self._checked_at: Optional[float] = None
+        self._fingerprint = ""
+        self.version = 0
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Compare les dates de modification au contenu indexé.
+
+        Sans force, la vérification n'a lieu qu'une fois par check_interval
+        secondes. Retourne True si l'index a changé.
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+
+        changed = False
+        seen = set()
+        for md_file in self.lang_dir.glob("*.md"):
+            try:
+                mtime_ns = md_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            slug = md_file.stem
+            seen.add(slug)
+            entry = self._entries.get(slug)
+            if entry is not None and entry[0] == mtime_ns:
+                continue
+            self._entries[slug] = (mtime_ns, read_page_meta(md_file))
+            changed = True
+
+        for slug in set(self._entries) - seen:
+            del self._entries[slug]
+            changed = True
+
+        if changed:
+            self._rebuild()
+        return changed
+
+    def _rebuild(self):
+        pages = [meta for _, meta in self._entries.values()]
+        pages.sort(key=lambda x: (x["order"], x["slug"]))
+        self._pages = pages
+        self._categories = None
+        self._fingerprint = hashlib.sha1(
+            "\n".join(f"{slug}:{entry[0]}" for slug, entry in sorted(self._entries.items())).encode("utf-8")
+        ).hexdigest()
+        self.version += 1
+
+    def pages(self) -> List[Dict]:
+        """Pages triées par ordre (liste partagée: ne pas modifier)"""
+        self.refresh()
+        return self._pages
+
+    def fingerprint(self) -> str:
+        """Empreinte des fichiers indexés (noms et dates de modification)"""
+        self.refresh()
+        return self._fingerprint
+
+    def categories(self) -> Dict[str, List[Dict]]:
+        """Pages groupées par nom de catégorie traduit"""
+        self.refresh()
+        if self._categories is None:
+            categories: Dict[str, List[Dict]] = {}
+            for page in self._pages:
+                categories.setdefault(self.label_category(page["category"]), []).append(page)
+            self._categories = categories
+        return self._categories
@@ -0,0 +1,54 @@
+"""
+Rendu Markdown du wiki
+
+Module volontairement minimal: il est importé par les workers du pool de
+rendu (processus ou threads). Chaque worker possède sa propre instance
+markdown.Markdown, réinitialisée avant chaque conversion, car ces instances
+conservent un état (table des matières, notes de bas de page...).
+"""
+
+from typing import Dict
+import threading
+
+import frontmatter
+import markdown
+
+# Extensions Markdown utilisées pour toutes les pages
+MARKDOWN_EXTENSIONS = [
+    'fenced_code',
+    'codehilite',
+    'tables',
+    'toc',
+    'attr_list',
+    'admonition'
+]
+
+_local = threading.local()
+
+
+def get_markdown() -> markdown.Markdown:
+    """Instance Markdown propre au thread (et donc au processus) courant"""
+    md = getattr(_local, "md", None)
+    if md is None:
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.md = md
+    return md
+
+
+def render_markdown(text: str) -> str:
+    """Convertit du markdown en HTML sans fuite d'état entre deux pages"""
+    md = get_markdown()
+    md.reset()
+    return md.convert(text)
+
+
+def render_markdown_file(page_path: str, page_name: str) -> Dict:
+    """Lit un fichier markdown (frontmatter compris) et retourne la page rendue"""
+    post = frontmatter.load(page_path)
+
+    return {
+        "title": post.get("title", page_name.title()),
+        "description": post.get("description", ""),
+        "content": render_markdown(post.content),
+        "metadata": post.metadata
+    }
@@ -0,0 +1,322 @@
+"""
+Recherche plein texte du wiki
+
+Index inversé par langue: chaque page est réduite à du texte brut,
+découpée en termes "repliés" (minuscules, sans accents: "Déployer" et
+"deployer" sont le même terme), et classée avec BM25. Le dernier mot tapé
+peut être incomplet: les termes de l'index qui le prolongent comptent aussi,
+avec un poids moindre (recherche au fil de la frappe).
+
+Comme PageIndex, l'index compare les dates de modification des fichiers et
+ne ré-indexe que les pages ajoutées, modifiées ou supprimées.
+"""
+
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import math
+import re
+import time
+import unicodedata
+
+import frontmatter
+from markupsafe import Markup, escape
+
+# Paramètres BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Un terme du titre compte comme TITLE_BOOST occurrences dans le corps
+TITLE_BOOST = 3
+DESCRIPTION_BOOST = 2
+
+# Préfixes: longueur minimale, poids relatif et nombre max de termes étendus
+MIN_PREFIX_LENGTH = 2
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 32
+
+SNIPPET_LENGTH = 200
+SNIPPET_CONTEXT = 60
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Syntaxe Markdown retirée avant indexation (le texte des liens est conservé)
+MARKDOWN_STRIP = [
+    (re.compile(r"^```[^\n]*$", re.M), " "),
+    (re.compile(r"!?\[([^\]]*)\]\([^)]*\)"), r"\1"),
+    (re.compile(r"<[^>]+>"), " "),
+    (re.compile(r"^[\s|:-]+$", re.M), " "),
+    (re.compile(r"^\s{0,3}(#{1,6}|>|[-*+]|\d+\.|!!!|\?\?\?)\s+", re.M), ""),
+    (re.compile(r"[*`~|]+"), " "),
+    (re.compile(r"\s+"), " "),
+]
+
+
+@lru_cache(maxsize=4096)
+def _fold_char(char: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", char)
+    base = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    if len(base) == 1:
+        return base
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+def fold(text: str) -> str:
+    """
+    Minuscules sans accents ("Élève" → "eleve").
+
+    Le résultat a toujours la même longueur que le texte d'origine: une
+    position trouvée dans le texte replié vaut pour le texte d'origine.
+    """
+    if text.isascii():
+        return text.lower()
+    return "".join(map(_fold_char, text))
+
+
+def tokenize(text: str) -> List[str]:
+    """Termes d'un texte déjà replié (les mots d'une lettre sont ignorés)"""
+    return [token for token in TOKEN_RE.findall(text) if len(token) > 1 or token.isdigit()]
+
+
+def markdown_to_text(content: str) -> str:
+    """Texte brut approximatif d'une page markdown (pour l'index et les extraits)"""
+    for pattern, replacement in MARKDOWN_STRIP:
+        content = pattern.sub(replacement, content)
+    return content.strip()
+
+
+class IndexedPage:
+    """Une page indexée: métadonnées, texte brut et fréquences des termes"""
+
+    __slots__ = ("slug", "mtime_ns", "title", "description", "text", "folded", "term_freqs", "length")
+
+    def __init__(self, slug: str, mtime_ns: int, title: str, description: str, text: str):
+        self.slug = slug
+        self.mtime_ns = mtime_ns
+        self.title = title
+        self.description = description
+        self.text = text
+        self.folded = fold(text)
+
+        term_freqs: Dict[str, int] = {}
+        for weight, tokens in (
+            (1, tokenize(self.folded)),
+            (TITLE_BOOST, tokenize(fold(title))),
+            (DESCRIPTION_BOOST, tokenize(fold(description))),
+        ):
+            for token in tokens:
+                term_freqs[token] = term_freqs.get(token, 0) + weight
+        self.term_freqs = term_freqs
+        self.length = sum(term_freqs.values())
+
+
+def load_indexed_page(md_file: Path, mtime_ns: int) -> IndexedPage:
+    post = frontmatter.load(md_file)
+    return IndexedPage(
+        md_file.stem,
+        mtime_ns,
+        str(post.get("title", md_file.stem.title())),
+        str(post.get("description", "")),
+        markdown_to_text(post.content)
+    )
+
+
+class SearchIndex:
+    """Index inversé BM25 des pages d'un répertoire"""
+
+    def __init__(self, lang_dir: Path, check_interval: float = 2.0):
+        self.lang_dir = lang_dir
+        self.check_interval = check_interval
+        self._pages: Dict[str, IndexedPage] = {}
+        # terme → {slug: fréquence pondérée}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self._total_length = 0
+        self._checked_at: Optional[float] = None
+        self.version = 0
+
+    def refresh(self, force: bool = False) -> bool:
+        """Ré-indexe les fichiers ajoutés, modifiés ou supprimés; True si changement"""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+
+        changed = False
+        seen = set()
+        for md_file in self.lang_dir.glob("*.md"):
+            try:
+                mtime_ns = md_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            slug = md_file.stem
+            seen.add(slug)
+            page = self._pages.get(slug)
+            if page is not None and page.mtime_ns == mtime_ns:
+                continue
+            if page is not None:
+                self._remove(page)
+            self._add(load_indexed_page(md_file, mtime_ns))
+            changed = True
+
+        for slug in set(self._pages) - seen:
+            self._remove(self._pages[slug])
+            changed = True
+
+        if changed:
+            self.version += 1
+        return changed
+
+    def _add(self, page: IndexedPage):
+        self._pages[page.slug] = page
+        self._total_length += page.length
+        for term, freq in page.term_freqs.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._sorted_terms = None
+            postings[page.slug] = freq
+
+    def _remove(self, page: IndexedPage):
+        del self._pages[page.slug]
+        self._total_length -= page.length
+        for term in page.term_freqs:
+            postings = self._postings[term]
+            del postings[page.slug]
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Termes de l'index correspondant à un terme de requête (exact, puis préfixe)"""
+        expansions = []
+        if term in self._postings:
+            expansions.append((term, 1.0))
+        if len(term) < MIN_PREFIX_LENGTH:
+            return expansions
+
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        i = bisect_left(terms, term)
+        while i < len(terms) and terms[i].startswith(term) and len(expansions) < MAX_PREFIX_EXPANSIONS:
+            if terms[i] != term:
+                expansions.append((terms[i], PREFIX_WEIGHT))
+            i += 1
+        return expansions
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Pages contenant tous les mots de la requête, par score BM25 décroissant.
+
+        Chaque résultat contient slug, title, description, score et snippet
+        (extrait HTML autour de la première occurrence, termes en <mark>).
+        """
+        self.refresh()
+        query_terms = list(dict.fromkeys(tokenize(fold(query))))
+        if not query_terms or not self._pages:
+            return []
+
+        doc_count = len(self._pages)
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Optional[Dict[str, float]] = None
+        matched: Dict[str, Set[str]] = {}
+
+        for query_term in query_terms:
+            term_scores: Dict[str, float] = {}
+            for term, weight in self._expand(query_term):
+                postings = self._postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for slug, freq in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._pages[slug].length / avg_length)
+                    term_scores[slug] = term_scores.get(slug, 0.0) + weight * idf * freq * (BM25_K1 + 1) / (freq + norm)
+                    matched.setdefault(slug, set()).add(term)
+
+            # Tous les mots doivent être présents
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {slug: score + term_scores[slug] for slug, score in scores.items() if slug in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        results = []
+        for slug, score in ranked:
+            page = self._pages[slug]
+            results.append({
+                "slug": slug,
+                "title": page.title,
+                "description": page.description,
+                "score": round(score, 4),
+                "snippet": make_snippet(page, matched[slug])
+            })
+        return results
+
+    def export(self) -> Dict:
+        """
+        Index sérialisable en JSON (recherche côté client du site statique).
+
+        Les pages sont numérotées; "terms" associe chaque terme à une liste
+        de paires [numéro de page, fréquence pondérée].
+        """
+        self.refresh()
+        slugs = sorted(self._pages)
+        numbers = {slug: i for i, slug in enumerate(slugs)}
+        return {
+            "bm25": {
+                "k1": BM25_K1,
+                "b": BM25_B,
+                "prefix_weight": PREFIX_WEIGHT,
+                "min_prefix_length": MIN_PREFIX_LENGTH,
+                "max_prefix_expansions": MAX_PREFIX_EXPANSIONS
+            },
+            "pages": [
+                {
+                    "slug": slug,
+                    "title": self._pages[slug].title,
+                    "description": self._pages[slug].description,
+                    "length": self._pages[slug].length
+                }
+                for slug in slugs
+            ],
+            "terms": {
+                term: sorted([numbers[slug], freq] for slug, freq in self._postings[term].items())
+                for term in sorted(self._postings)
+            }
+        }
+
+
+def make_snippet(page: IndexedPage, terms: Iterable[str]) -> Markup:
+    """Extrait autour de la première occurrence d'un terme, termes surlignés"""
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)) + r")\b"
+    )
+    text, folded = page.text, page.folded
+
+    first = pattern.search(folded)
+    if first is None:
+        # Terme trouvé seulement dans le titre ou la description
+        start = 0
+    else:
+        start = max(0, first.start() - SNIPPET_CONTEXT)
+        if start > 0:
+            space = text.find(" ", start, first.start())
+            start = space + 1 if space != -1 else start
+    end = min(len(text), start + SNIPPET_LENGTH)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+
+    parts = ["…" if start > 0 else ""]
+    position = start
+    for match in pattern.finditer(folded, start, end):
+        parts.append(str(escape(text[position:match.start()])))
+        parts.append(f"<mark>{escape(text[match.start():match.end()])}</mark>")
+        position = match.end()
+    parts.append(str(escape(text[position:end])))
+    if end < len(text):
+        parts.append("…")
+    return Markup("".join(parts))
@@ -0,0 +1,112 @@
+"""
+Démarrage à froid: templates Jinja précompilés et mesures de démarrage
+
+Les templates sont compilés au démarrage (et non à la première requête),
+avec un cache de bytecode sur disque: un redémarrage recharge le code
+compilé au lieu de re-parser les templates. En production, auto_reload est
+désactivé: Jinja ne vérifie plus la date du fichier source à chaque rendu.
+
+StartupMetrics mesure la durée du démarrage à froid (chargement du module →
+application prête) et la latence de la première requête; elles sont
+exposées sur /health.
+
+Même code que grades-dashboard/startup.py: chaque image Docker est
+construite depuis le répertoire de son application (build: ./wiki dans
+docker-compose.yml), qui ne peut pas importer un module situé hors de ce
+répertoire. Toute modification doit être reportée dans les deux copies.
+"""
+
+from typing import Dict, Optional
+import os
+import time
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def create_templates(directory: str, cache_dir: Optional[str], auto_reload: bool) -> Jinja2Templates:
+    """Jinja2Templates avec cache de bytecode (si cache_dir est accessible en écriture)"""
+    bytecode_cache = None
+    if cache_dir:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            if os.access(cache_dir, os.W_OK):
+                bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+            else:
+                print(f"⚠️  Cache des templates {cache_dir} non accessible en écriture, désactivé")
+        except OSError as e:
+            print(f"⚠️  Cache des templates désactivé: {e}")
+
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(directory),
+        autoescape=True,
+        auto_reload=auto_reload,
+        bytecode_cache=bytecode_cache
+    )
+    return Jinja2Templates(env=env)
+
+
+def precompile_templates(templates: Jinja2Templates) -> Dict:
+    """Compile tous les templates .html; retourne leur nombre et la durée"""
+    start = time.perf_counter()
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return {
+        "count": len(names),
+        "compile_ms": round((time.perf_counter() - start) * 1000, 2),
+        "bytecode_cache": templates.env.bytecode_cache is not None,
+        "auto_reload": templates.env.auto_reload
+    }
+
+
+class StartupMetrics:
+    """Durées de démarrage à froid et de la première requête"""
+
+    def __init__(self):
+        self.began = time.perf_counter()
+        self.ready_ms: Optional[float] = None
+        self.templates: Dict = {}
+        self.first_request: Optional[Dict] = None
+
+    def mark_ready(self):
+        self.ready_ms = round((time.perf_counter() - self.began) * 1000, 2)
+
+    def record_first_request(self, path: str, duration: float):
+        if self.first_request is None:
+            self.first_request = {"path": path, "latency_ms": round(duration * 1000, 2)}
+
+    def as_dict(self) -> Dict:
+        return {
+            "ready": self.ready_ms is not None,
+            "cold_start_ms": self.ready_ms,
+            "templates": self.templates,
+            "first_request": self.first_request
+        }
+
+
+class FirstRequestTimer:
+    """Middleware ASGI: mesure la première requête servie (hors /health)"""
+
+    def __init__(self, app: ASGIApp, metrics: StartupMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or self.metrics.first_request is not None
+            or scope["path"] == "/health"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_and_time(message: Message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self.metrics.record_first_request(scope["path"], time.perf_counter() - start)
+
+        await self.app(scope, receive, send_and_time)
@@ -0,0 +1,196 @@
+// Search-as-you-type from the exported search index (/{lang}/search-index.json)
+// Mirrors search_index.py: folded terms, prefix expansion of the last words,
+// BM25 ranking, every query word required. Works on the static export too;
+// without JavaScript the form falls back to the /{lang}/search page.
+(function() {
+    'use strict';
+
+    const MAX_RESULTS = 8;
+    const TOKEN_RE = /[\p{L}\p{N}_]+/gu;
+
+    // Lowercase without accents, one character at a time (like fold() in Python)
+    function foldChar(char) {
+        const base = char.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+        if (base.length === 1) {
+            return base;
+        }
+        const lowered = char.toLowerCase();
+        return lowered.length === 1 ? lowered : char;
+    }
+
+    function tokenize(text) {
+        const folded = Array.from(text, foldChar).join('');
+        const tokens = folded.match(TOKEN_RE) || [];
+        return tokens.filter(function(token) {
+            return token.length > 1 || /^\p{N}$/u.test(token);
+        });
+    }
+
+    function prepare(data) {
+        const pages = data.pages;
+        const totalLength = pages.reduce(function(sum, page) { return sum + page.length; }, 0);
+        return {
+            params: data.bm25,
+            pages: pages,
+            terms: data.terms,
+            sortedTerms: Object.keys(data.terms).sort(),
+            avgLength: totalLength / pages.length || 1
+        };
+    }
+
+    // Index terms matching a query term: exact, then longer terms sharing the prefix
+    function expand(index, term) {
+        const expansions = [];
+        if (Object.prototype.hasOwnProperty.call(index.terms, term)) {
+            expansions.push([term, 1]);
+        }
+        if (term.length < index.params.min_prefix_length) {
+            return expansions;
+        }
+        const terms = index.sortedTerms;
+        let low = 0;
+        let high = terms.length;
+        while (low < high) {
+            const middle = (low + high) >> 1;
+            if (terms[middle] < term) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        for (let i = low; i < terms.length && terms[i].startsWith(term)
+                && expansions.length < index.params.max_prefix_expansions; i++) {
+            if (terms[i] !== term) {
+                expansions.push([terms[i], index.params.prefix_weight]);
+            }
+        }
+        return expansions;
+    }
+
+    function search(index, query) {
+        const queryTerms = Array.from(new Set(tokenize(query)));
+        if (!queryTerms.length || !index.pages.length) {
+            return [];
+        }
+        const k1 = index.params.k1;
+        const b = index.params.b;
+        const docCount = index.pages.length;
+        let scores = null;
+
+        for (const queryTerm of queryTerms) {
+            const termScores = new Map();
+            for (const [term, weight] of expand(index, queryTerm)) {
+                const postings = index.terms[term];
+                const idf = Math.log(1 + (docCount - postings.length + 0.5) / (postings.length + 0.5));
+                for (const [page, freq] of postings) {
+                    const norm = k1 * (1 - b + b * index.pages[page].length / index.avgLength);
+                    const score = weight * idf * freq * (k1 + 1) / (freq + norm);
+                    termScores.set(page, (termScores.get(page) || 0) + score);
+                }
+            }
+
+            // Every query word must be present
+            if (scores === null) {
+                scores = termScores;
+            } else {
+                for (const [page, score] of scores) {
+                    if (termScores.has(page)) {
+                        scores.set(page, score + termScores.get(page));
+                    } else {
+                        scores.delete(page);
+                    }
+                }
+            }
+            if (!scores.size) {
+                return [];
+            }
+        }
+
+        return Array.from(scores)
+            .sort(function(a, c) {
+                return c[1] - a[1] || (index.pages[a[0]].slug < index.pages[c[0]].slug ? -1 : 1);
+            })
+            .slice(0, MAX_RESULTS)
+            .map(function(entry) { return index.pages[entry[0]]; });
+    }
+
+    function renderResults(list, lang, results) {
+        list.replaceChildren();
+        for (const page of results) {
+            const link = document.createElement('a');
+            link.href = '/' + lang + '/page/' + page.slug;
+            link.className = 'block px-6 py-3 text-left hover:bg-gray-100 dark:hover:bg-gray-700';
+
+            const title = document.createElement('div');
+            title.className = 'font-semibold text-gray-900 dark:text-gray-100';
+            title.textContent = page.title;
+            link.appendChild(title);
+
+            if (page.description) {
+                const description = document.createElement('div');
+                description.className = 'text-sm text-gray-600 dark:text-gray-400';
+                description.textContent = page.description;
+                link.appendChild(description);
+            }
+            list.appendChild(link);
+        }
+        list.classList.toggle('hidden', !results.length);
+    }
+
+    function initSearch(form) {
+        const input = form.querySelector('input[name="q"]');
+        const lang = form.dataset.lang;
+        if (!input || !lang) {
+            return;
+        }
+
+        const list = document.createElement('div');
+        list.className = 'hidden absolute left-0 right-0 mt-2 bg-white dark:bg-gray-800 rounded-lg shadow-lg overflow-hidden z-50';
+        list.setAttribute('role', 'listbox');
+        form.appendChild(list);
+
+        let loading = null;
+        function loadIndex() {
+            if (loading === null) {
+                loading = fetch(form.dataset.searchIndex)
+                    .then(function(response) {
+                        if (!response.ok) {
+                            throw new Error('search index: ' + response.status);
+                        }
+                        return response.json();
+                    })
+                    .then(prepare);
+            }
+            return loading;
+        }
+
+        input.addEventListener('focus', loadIndex, { once: true });
+        input.addEventListener('input', function() {
+            const query = input.value;
+            loadIndex()
+                .then(function(index) {
+                    // Ignore answers for an outdated query
+                    if (input.value === query) {
+                        renderResults(list, lang, search(index, query));
+                    }
+                })
+                .catch(function() {
+                    list.classList.add('hidden');
+                });
+        });
+        input.addEventListener('keydown', function(event) {
+            if (event.key === 'Escape') {
+                list.classList.add('hidden');
+            }
+        });
+        document.addEventListener('click', function(event) {
+            if (!form.contains(event.target)) {
+                list.classList.add('hidden');
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('form[data-search-index]').forEach(initSearch);
+    });
+})();
@@ -0,0 +1,87 @@
+"""
+Export statique du wiki servi avant les routes (voir build_static.py)
+
+Avec STATIC_EXPORT_DIR, les pages de l'export sont envoyées par StaticFiles
+sans passer par FastAPI ni Jinja. Une langue n'est servie depuis l'export
+que si son empreinte dans manifest.json est celle du contenu actuel
+(app.export_fingerprint: pages, templates, traductions, domaine): après une
+modification de content/ non suivie d'un nouveau build, ou pour un fichier
+absent de l'export, la requête continue vers l'application dynamique.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import json
+import re
+
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Routes exportées: /{lang}/, /{lang}/page/{slug}, /{lang}/search-index.json
+EXPORTED_ROUTE = re.compile(r"^/(?P<lang>[a-z]{2})/(?:page/(?P<slug>[\w-]+)|(?P<index>search-index\.json))?$")
+
+
+def export_file(path: str) -> Optional[tuple]:
+    """(langue, fichier relatif de l'export) d'une URL, None si elle n'est pas exportée"""
+    match = EXPORTED_ROUTE.match(path)
+    if match is None:
+        return None
+    lang = match["lang"]
+    if match["slug"]:
+        return lang, f"{lang}/page/{match['slug']}/index.html"
+    if match["index"]:
+        return lang, f"{lang}/search-index.json"
+    return lang, f"{lang}/index.html"
+
+
+class StaticExportMiddleware:
+    """Sert les fichiers à jour de l'export, délègue le reste à l'application"""
+
+    def __init__(self, app: ASGIApp, directory: str, fingerprint: Callable[[str], Optional[str]]):
+        self.app = app
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+        self.files = StaticFiles(directory=directory)
+        self._manifest_mtime_ns: Optional[int] = None
+        self._fingerprints: Dict[str, str] = {}
+
+    def built_fingerprint(self, lang: str) -> Optional[str]:
+        """Empreinte de la langue au moment du build (manifest.json relu s'il a changé)"""
+        manifest = self.directory / "manifest.json"
+        try:
+            mtime_ns = manifest.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime_ns != self._manifest_mtime_ns:
+            try:
+                languages = json.loads(manifest.read_text(encoding="utf-8")).get("languages", {})
+            except (OSError, ValueError):
+                languages = {}
+            self._fingerprints = {code: entry.get("fingerprint") for code, entry in languages.items()}
+            self._manifest_mtime_ns = mtime_ns
+        return self._fingerprints.get(lang)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        target = None
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            target = export_file(scope["path"])
+        if target is not None:
+            lang, relative = target
+            built = self.built_fingerprint(lang)
+            if built is None or built != self.fingerprint(lang) or not (self.directory / relative).is_file():
+                target = None
+        if target is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Comme les pages dynamiques: revalidation à chaque visite (ETag de StaticFiles)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"cache-control", b"no-cache"),
+                    (b"content-language", lang.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.files({**scope, "path": f"/{relative}", "root_path": ""}, receive, send_with_headers)